@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+
+from app.models.user import UserRole
+from app.services.auth_service import decode_access_token, TokenData
+from app.services.analytics_service import response_analytics
+from app.database import get_db
+from fastapi.security import OAuth2PasswordBearer
+
+router = APIRouter()
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> TokenData:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    token_data = decode_access_token(token)
+    if token_data is None or token_data.id is None:
+        raise credentials_exception
+    return token_data
+
+@router.get("/response-times")
+async def get_response_time_analytics(
+    team: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Response-time percentiles, CPR/AED usage and drill durations per team and time window"""
+    # Check if user has permission (coach or referee)
+    if current_user.role not in [UserRole.coach, UserRole.referee]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only coaches and referees can view response analytics"
+        )
+    
+    return {
+        "team": team,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        # False while the startup backfill is still replaying stored reports and drills
+        "complete": response_analytics.backfilled,
+        **response_analytics.summary(team=team, start=start, end=end)
+    }
@@ -1,26 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
+import asyncio
+import math
 
 from app.models.user import UserCreate, UserResponse, User as UserModel
 from app.services.user_service import create_user, get_user_by_email
 from app.services.auth_service import create_access_token, verify_password, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.services.rate_limiter import login_limiter, password_executor, client_ip
 from app.database import get_db
 
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse)
 def register_user(user: UserCreate, db: Session = Depends(get_db)):
+    # The duplicate check must see accounts registered a moment ago
+    db.use_primary()
     db_user = get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     return create_user(db=db, user=user)
 
+def _reject_busy():
+    login_limiter.shed["busy"] += 1
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Login is busy, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/login")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = get_user_by_email(db, email=form_data.username) # OAuth2PasswordRequestForm uses 'username' for email
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login_for_access_token(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: Session = Depends(get_db)
+):
+    # Shed over-limit attempts before any bcrypt work is done
+    retry_after = await login_limiter.admit(
+        form_data.username,
+        client_ip(request.client.host if request.client else None, request.headers.get("x-forwarded-for")),
+    )
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    # Shed early when the hashing pool is saturated, so unknown emails get the same answer
+    if not password_executor.has_capacity():
+        _reject_busy()
+
+    user = await run_in_threadpool(get_user_by_email, db, form_data.username) # OAuth2PasswordRequestForm uses 'username' for email
+    # Unknown emails fail without hashing; bcrypt runs on its own bounded pool,
+    # which reserves its slot itself in case it filled up during the lookup
+    try:
+        verified = bool(user) and await password_executor.run(verify_password, form_data.password, user.hashed_password)
+    except asyncio.QueueFull:
+        _reject_busy()
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import random
 from datetime import datetime, timedelta
 
 from app.models.user import UserRole
 from app.services.auth_service import decode_access_token, TokenData
+from app.services.vitals_store import vitals_store
+from app.services.response_cache import dashboard_cache, SAMPLE_INTERVAL_SECONDS, STATIC_TTL_SECONDS
 from app.database import get_db
 from fastapi.security import OAuth2PasswordBearer
 
@@ -59,13 +61,22 @@ def generate_athlete_status(athlete_id: int) -> Dict[str, Any]:
 
 # API Endpoints
 @router.get("/athlete")
-async def get_athlete_dashboard(current_user: TokenData = Depends(get_current_user)):
+async def get_athlete_dashboard(request: Request, current_user: TokenData = Depends(get_current_user)):
     """Get dashboard data for an athlete user"""
     if current_user.role != UserRole.athlete.value:
         raise HTTPException(status_code=403, detail="Access denied: Athlete role required")
     
+    return dashboard_cache.respond(
+        request, "athlete", lambda: build_athlete_dashboard(current_user.id),
+        ttl=SAMPLE_INTERVAL_SECONDS, user_id=current_user.id
+    )
+
+def build_athlete_dashboard(athlete_id: int) -> Dict[str, Any]:
+    vital_signs = generate_vital_signs()
+    vitals_store.append(athlete_id, vital_signs)
+    
     return {
-        "vital_signs": generate_vital_signs(),
+        "vital_signs": vital_signs,
         "cpr_system": generate_cpr_status(),
         "emergency_contacts": [
             {"id": 1, "name": "Team Doctor", "phone": "555-123-4567", "relationship": "Medical Staff"},
@@ -75,11 +86,17 @@ async def get_athlete_dashboard(current_user: TokenData = Depends(get_current_us
     }
 
 @router.get("/coach")
-async def get_coach_dashboard(current_user: TokenData = Depends(get_current_user)):
+async def get_coach_dashboard(request: Request, current_user: TokenData = Depends(get_current_user)):
     """Get dashboard data for a coach user"""
     if current_user.role != UserRole.coach.value:
         raise HTTPException(status_code=403, detail="Access denied: Coach role required")
     
+    return dashboard_cache.respond(
+        request, "coach", build_coach_dashboard,
+        ttl=SAMPLE_INTERVAL_SECONDS, user_id=current_user.id
+    )
+
+def build_coach_dashboard() -> Dict[str, Any]:
     # Generate mock data for multiple athletes
     athletes = [generate_athlete_status(i) for i in range(1, 11)]
     
@@ -103,6 +120,9 @@ async def get_athlete_details(athlete_id: int, current_user: TokenData = Depends
     
     # In a real app, we would check if this coach has permission to view this athlete's data
     
+    vital_signs = generate_vital_signs()
+    vitals_store.append(athlete_id, vital_signs)
+    
     return {
         "athlete_info": {
             "id": athlete_id,
@@ -111,7 +131,7 @@ async def get_athlete_details(athlete_id: int, current_user: TokenData = Depends
             "position": random.choice(["Forward", "Midfielder", "Defender", "Goalkeeper"]),
             "jersey_number": random.randint(1, 99)
         },
-        "vital_signs": generate_vital_signs(),
+        "vital_signs": vital_signs,
         "cpr_system": generate_cpr_status(),
         "training_load": {
             "today": random.randint(300, 800),
@@ -126,12 +146,35 @@ async def get_athlete_details(athlete_id: int, current_user: TokenData = Depends
         ]
     }
 
+@router.get("/coach/athlete/{athlete_id}/vitals-history")
+async def get_athlete_vitals_history(
+    athlete_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Get stored vital sign samples for an athlete within a time range (coach view)"""
+    if current_user.role != UserRole.coach.value:
+        raise HTTPException(status_code=403, detail="Access denied: Coach role required")
+    
+    slices = vitals_store.query(athlete_id, start=start, end=end)
+    
+    return {
+        "athlete_id": athlete_id,
+        "sample_count": sum(len(part) for part in slices),
+        "segments": [part.to_dict() for part in slices]
+    }
+
 @router.get("/teammate")
-async def get_teammate_dashboard(current_user: TokenData = Depends(get_current_user)):
+async def get_teammate_dashboard(request: Request, current_user: TokenData = Depends(get_current_user)):
     """Get dashboard data for a teammate user"""
     if current_user.role != UserRole.teammate.value:
         raise HTTPException(status_code=403, detail="Access denied: Teammate role required")
     
+    # Shared by every teammate, so cache it once for the role
+    return dashboard_cache.respond(request, "teammate", build_teammate_dashboard, ttl=STATIC_TTL_SECONDS)
+
+def build_teammate_dashboard() -> Dict[str, Any]:
     return {
         "team_status": {
             "alerts": [],  # Empty if no emergencies
@@ -147,11 +190,15 @@ async def get_teammate_dashboard(current_user: TokenData = Depends(get_current_u
     }
 
 @router.get("/referee")
-async def get_referee_dashboard(current_user: TokenData = Depends(get_current_user)):
+async def get_referee_dashboard(request: Request, current_user: TokenData = Depends(get_current_user)):
     """Get dashboard data for a referee user"""
     if current_user.role != UserRole.referee.value:
         raise HTTPException(status_code=403, detail="Access denied: Referee role required")
     
+    # Shared by every referee, so cache it once for the role
+    return dashboard_cache.respond(request, "referee", build_referee_dashboard, ttl=STATIC_TTL_SECONDS)
+
+def build_referee_dashboard() -> Dict[str, Any]:
     return {
         "match_info": {
             "current_match": {
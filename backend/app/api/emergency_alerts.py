@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status, Body
 from sqlalchemy.orm import Session
 from typing import Dict, Any, Optional
-import json
 
 from app.services.auth_service import decode_access_token, TokenData
-from app.services.emergency_alert_service import manager, simulate_cardiac_anomaly
+from app.services.emergency_alert_service import manager, simulate_cardiac_anomaly, ENCODINGS, COMPRESSIONS
+from app.services.responder_tracker import responder_tracker
 from app.database import get_db
 from fastapi.security import OAuth2PasswordBearer
 
@@ -24,20 +24,43 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     return token_data
 
 @router.websocket("/ws/{user_id}/{role}")
-async def websocket_endpoint(websocket: WebSocket, user_id: str, role: str):
-    await manager.connect(websocket, user_id, role)
+async def websocket_endpoint(
+    websocket: WebSocket,
+    user_id: str,
+    role: str,
+    encoding: str = "json",
+    compression: Optional[str] = None
+):
+    # Clients pick the frame format at connect time, e.g. ?encoding=msgpack&compression=deflate
+    if encoding not in ENCODINGS or compression not in COMPRESSIONS:
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
+    await manager.connect(websocket, user_id, role, encoding, compression)
     try:
         while True:
             # Wait for messages from the client
-            data = await websocket.receive_text()
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", status.WS_1000_NORMAL_CLOSURE))
+            data = frame.get("bytes") if frame.get("bytes") is not None else frame.get("text")
             try:
-                message = json.loads(data)
+                message = manager.decode(websocket, data)
+                if not isinstance(message, dict):
+                    await manager.send(websocket, {"type": "error", "message": "Messages must be objects"})
+                    continue
                 # Handle different message types
                 if message.get("type") == "ping":
-                    await websocket.send_json({"type": "pong", "timestamp": message.get("timestamp")})
+                    await manager.send(websocket, {"type": "pong", "timestamp": message.get("timestamp")})
                 elif message.get("type") == "emergency_response":
                     # Handle emergency response messages
-                    # This could be used to track who is responding to an emergency
+                    # Record who is responding and how long it took them
+                    responder = responder_tracker.record(
+                        str(message.get("emergency_id")),
+                        user_id,
+                        role,
+                        status=message.get("status", "responding"),
+                        eta=message.get("eta")
+                    )
                     response_data = {
                         "type": "emergency_update",
                         "emergency_id": message.get("emergency_id"),
@@ -45,17 +68,22 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str, role: str):
                             "user_id": user_id,
                             "role": role,
                             "status": message.get("status", "responding"),
-                            "eta": message.get("eta")
+                            "eta": message.get("eta"),
+                            "response_time_seconds": responder["response_time_seconds"] if responder else None
                         }
                     }
                     # Broadcast the response to relevant parties
+                    frames = {}
                     if "athlete_id" in message:
-                        await manager.send_personal_message(response_data, message["athlete_id"], "athlete")
-                    await manager.broadcast_by_role(response_data, "coach")
-                    await manager.broadcast_by_role(response_data, "referee")
-            except json.JSONDecodeError:
-                await websocket.send_json({"type": "error", "message": "Invalid JSON format"})
+                        await manager.send_personal_message(response_data, message["athlete_id"], "athlete", frames)
+                    await manager.broadcast_by_role(response_data, "coach", frames)
+                    await manager.broadcast_by_role(response_data, "referee", frames)
+            except ValueError:
+                await manager.send(websocket, {"type": "error", "message": f"Invalid {encoding} format"})
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Unregister however the loop ends, so a failed handler never leaves a dead socket behind
         manager.disconnect(websocket, user_id, role)
 
 @router.post("/trigger-emergency")
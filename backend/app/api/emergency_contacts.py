@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,7 +7,8 @@ from app.models.emergency_contact import EmergencyContactCreate, EmergencyContac
 from app.models.user import User as UserModel
 from app.services.emergency_contact_service import (
     create_emergency_contact,
-    get_emergency_contacts_by_user,
+    get_emergency_contact_rows,
+    contact_to_dict,
     get_emergency_contact,
     update_emergency_contact,
     delete_emergency_contact
@@ -44,7 +46,8 @@ def add_emergency_contact(
 ):
     if current_user.id is None: # Should be caught by get_current_user, but as a safeguard
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User ID not found in token")
-    return create_emergency_contact(db=db, contact=contact, user_id=current_user.id)
+    db_contact = create_emergency_contact(db=db, contact=contact, user_id=current_user.id)
+    return ORJSONResponse(contact_to_dict(db_contact), status_code=status.HTTP_201_CREATED)
 
 @router.get("/", response_model=List[EmergencyContactResponse])
 def read_emergency_contacts(
@@ -55,8 +58,8 @@ def read_emergency_contacts(
 ):
     if current_user.id is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User ID not found in token")
-    contacts = get_emergency_contacts_by_user(db, user_id=current_user.id, skip=skip, limit=limit)
-    return contacts
+    # Rows come straight from our own table, so they are serialized directly; response_model stays for the schema
+    return ORJSONResponse(get_emergency_contact_rows(db, user_id=current_user.id, skip=skip, limit=limit))
 
 @router.get("/{contact_id}", response_model=EmergencyContactResponse)
 def read_single_emergency_contact(
@@ -69,7 +72,7 @@ def read_single_emergency_contact(
     db_contact = get_emergency_contact(db, contact_id=contact_id, user_id=current_user.id)
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Emergency contact not found")
-    return db_contact
+    return ORJSONResponse(contact_to_dict(db_contact))
 
 @router.put("/{contact_id}", response_model=EmergencyContactResponse)
 def edit_emergency_contact(
@@ -83,7 +86,7 @@ def edit_emergency_contact(
     db_contact = update_emergency_contact(db, contact_id=contact_id, contact_update=contact, user_id=current_user.id)
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Emergency contact not found or not authorized to update")
-    return db_contact
+    return ORJSONResponse(contact_to_dict(db_contact))
 
 @router.delete("/{contact_id}", response_model=EmergencyContactResponse)
 def remove_emergency_contact(
@@ -96,4 +99,4 @@ def remove_emergency_contact(
     db_contact = delete_emergency_contact(db, contact_id=contact_id, user_id=current_user.id)
     if db_contact is None:
         raise HTTPException(status_code=404, detail="Emergency contact not found or not authorized to delete")
-    return db_contact
\ No newline at end of file
+    return ORJSONResponse(contact_to_dict(db_contact))
\ No newline at end of file
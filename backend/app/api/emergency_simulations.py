@@ -4,11 +4,15 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import random
 import uuid
-import asyncio
 
 from app.models.user import UserRole
 from app.services.auth_service import decode_access_token, TokenData
 from app.services.emergency_alert_service import manager
+from app.services.analytics_service import response_analytics
+from app.services.responder_tracker import responder_tracker
+from app.services.task_supervisor import task_supervisor
+from app.services.simulation_store import simulation_store
+from app.services.emergency_event_log import event_log
 from app.database import get_db
 from fastapi.security import OAuth2PasswordBearer
 
@@ -27,9 +31,6 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
     return token_data
 
-# Store active simulations
-active_simulations = {}
-
 @router.post("/start")
 async def start_emergency_simulation(
     simulation_data: Dict[str, Any] = Body(...),
@@ -54,6 +55,7 @@ async def start_emergency_simulation(
     athlete_name = simulation_data.get("athlete_name", "Simulated Athlete")
     location = simulation_data.get("location", "Training Field")
     anomaly_type = simulation_data.get("anomaly_type", "Ventricular Fibrillation")
+    team = simulation_data.get("team")
     
     # Create the simulation emergency data
     emergency_data = {
@@ -73,26 +75,36 @@ async def start_emergency_simulation(
             "id": current_user.id,
             "role": current_user.role
         },
+        "team": team,
         "responders": []
     }
     
+    # Responder updates arriving over the WebSocket are recorded by the tracker;
+    # the simulation shares its responder list and response time dict
+    responses = responder_tracker.register(simulation_id, team=team, is_simulation=True)
+    
     # Store the simulation
-    active_simulations[simulation_id] = {
+    simulation = {
         **emergency_data,
+        "responders": responses.responders,
         "start_time": timestamp,
         "end_time": None,
         "status": "active",
-        "response_times": {}
+        "response_times": responses.response_times,
+        "first_response_seconds": None
     }
+    simulation_store.add(simulation)
+    event_log.append("simulation_started", simulation_id, simulation)
     
     # Broadcast the emergency alert to all relevant users
     # In a real app, we would filter by team/organization
-    asyncio.create_task(
-        manager.broadcast_emergency_alert({
+    task_supervisor.spawn(
+        manager.broadcast_simulation_update({
             "type": "emergency_alert",
             "emergency": emergency_data,
             "is_simulation": True
-        })
+        }),
+        name="simulation_start_broadcast"
     )
     
     return {
@@ -114,44 +126,62 @@ async def end_emergency_simulation(
             detail="Only coaches can end emergency simulations"
         )
     
-    # Check if the simulation exists
-    if simulation_id not in active_simulations:
+    # Check if the simulation exists and is still running
+    simulation = simulation_store.get(simulation_id)
+    if simulation is None or simulation["status"] != "active":
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Simulation not found"
         )
     
     # Check if the simulation was started by the current user
-    if active_simulations[simulation_id]["initiated_by"]["id"] != current_user.id:
+    if simulation["initiated_by"]["id"] != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only end simulations that you started"
         )
     
     # Update the simulation status
-    active_simulations[simulation_id]["status"] = "completed"
-    active_simulations[simulation_id]["end_time"] = datetime.now().isoformat()
+    simulation["status"] = "completed"
+    simulation["end_time"] = datetime.now().isoformat()
+    simulation["duration_seconds"] = calculate_duration(simulation["start_time"], simulation["end_time"])
+    simulation_store.complete(simulation_id)
+    
+    # Stop accepting responder updates and keep the final first-response latency
+    responses = responder_tracker.remove(simulation_id)
+    if responses is not None:
+        simulation["first_response_seconds"] = responses.first_response_seconds
+    
+    event_log.append("simulation_ended", simulation_id, {
+        key: simulation[key]
+        for key in ("status", "end_time", "duration_seconds", "first_response_seconds", "responders", "response_times")
+    })
+    
+    # Feed the drill into the response-time analytics
+    response_analytics.record_drill(simulation["team"], simulation["start_time"], simulation["duration_seconds"])
     
     # Broadcast the end of the simulation
-    asyncio.create_task(
-        manager.broadcast_emergency_alert({
+    task_supervisor.spawn(
+        manager.broadcast_simulation_update({
             "type": "emergency_resolved",
             "emergency_id": simulation_id,
             "is_simulation": True,
-            "resolved_at": active_simulations[simulation_id]["end_time"],
+            "resolved_at": simulation["end_time"],
             "resolved_by": {
                 "id": current_user.id,
                 "role": current_user.role
             }
-        })
+        }),
+        name="simulation_end_broadcast"
     )
     
     return {
         "simulation_id": simulation_id,
         "message": "Emergency simulation ended successfully",
-        "ended_at": active_simulations[simulation_id]["end_time"],
-        "duration_seconds": calculate_duration(active_simulations[simulation_id]["start_time"], active_simulations[simulation_id]["end_time"]),
-        "responders": active_simulations[simulation_id]["responders"]
+        "ended_at": simulation["end_time"],
+        "duration_seconds": simulation["duration_seconds"],
+        "responders": simulation["responders"],
+        "first_response_seconds": simulation["first_response_seconds"]
     }
 
 @router.get("/active")
@@ -164,25 +194,25 @@ async def list_active_simulations(current_user: TokenData = Depends(get_current_
             detail="Only coaches can view emergency simulations"
         )
     
-    # Filter simulations by status and initiated_by
+    # Only this coach's active simulations are looked at
     user_simulations = [
         {
-            "id": sim_id,
+            "id": sim["id"],
             "athlete_name": sim["athlete_name"],
             "started_at": sim["start_time"],
             "location": sim["location"]["description"],
             "responder_count": len(sim["responders"])
         }
-        for sim_id, sim in active_simulations.items()
-        if sim["status"] == "active" and sim["initiated_by"]["id"] == current_user.id
+        for sim in simulation_store.active_for(current_user.id)
     ]
     
     return {"simulations": user_simulations}
 
 @router.get("/{simulation_id}")
-async def get_simulation_details(
+def get_simulation_details(
     simulation_id: str,
-    current_user: TokenData = Depends(get_current_user)
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_db)
 ):
     """Get details of a specific emergency simulation"""
     # Check if user has permission (coach only)
@@ -192,21 +222,29 @@ async def get_simulation_details(
             detail="Only coaches can view emergency simulations"
         )
     
-    # Check if the simulation exists
-    if simulation_id not in active_simulations:
+    # Recent simulations are in memory; older completed ones come from the archive.
+    # A plain def, so FastAPI runs the archive query in its threadpool instead of on the event loop
+    simulation = simulation_store.get(simulation_id)
+    if simulation is None:
+        simulation = simulation_store.get_archived(db, simulation_id)
+    if simulation is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Simulation not found"
         )
     
     # Check if the simulation was started by the current user
-    if active_simulations[simulation_id]["initiated_by"]["id"] != current_user.id:
+    if simulation["initiated_by"]["id"] != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only view simulations that you started"
         )
     
-    return active_simulations[simulation_id]
+    responses = responder_tracker.get(simulation_id)
+    if responses is not None:
+        # Still running: the latency so far lives on the tracker entry
+        return {**simulation, "first_response_seconds": responses.first_response_seconds}
+    return simulation
 
 # Helper function to calculate duration between two ISO timestamps
 def calculate_duration(start_time: str, end_time: str) -> int:
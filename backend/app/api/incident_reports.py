@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+import asyncio
 import uuid
 
 from app.models.user import UserRole
 from app.services.auth_service import decode_access_token, TokenData
+from app.services import incident_report_service
+from app.services.job_queue import report_jobs
 from app.database import get_db
 from fastapi.security import OAuth2PasswordBearer
 
@@ -25,15 +28,12 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
     return token_data
 
-# Mock incident data store (in a real app, this would be in a database)
-incident_reports = {}
-
-@router.post("/generate")
+@router.post("/generate", status_code=status.HTTP_202_ACCEPTED)
 async def generate_incident_report(
     emergency_id: str = Body(...),
     current_user: TokenData = Depends(get_current_user)
 ):
-    """Generate a new incident report for a completed emergency"""
+    """Queue generation of an incident report for a completed emergency"""
     # Check if user has permission (coach or referee)
     if current_user.role not in [UserRole.coach, UserRole.referee]:
         raise HTTPException(
@@ -41,61 +41,56 @@ async def generate_incident_report(
             detail="Only coaches and referees can generate incident reports"
         )
     
-    # In a real app, we would fetch the emergency details from the database
-    # For now, we'll generate mock data
-    
-    # Generate a unique report ID
-    report_id = str(uuid.uuid4())
-    
-    # Create timestamp for the report
-    timestamp = datetime.now().isoformat()
+    # Repeated calls for the same emergency share one job; the report ID is fixed per job so retries are idempotent
+    try:
+        job = report_jobs.submit(
+            incident_report_service.generate_incident_report, emergency_id, current_user.id, str(uuid.uuid4()),
+            key=emergency_id
+        )
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Report generation queue is full, try again later"
+        )
     
-    # Mock data for the incident report
-    report = {
-        "id": report_id,
-        "emergency_id": emergency_id,
-        "generated_by": current_user.id,
-        "generated_at": timestamp,
-        "athlete_data": {
-            "id": random.randint(1, 100),
-            "name": "John Doe",
-            "age": random.randint(18, 35),
-            "team": "Team Alpha"
-        },
-        "incident_details": {
-            "timestamp": (datetime.now() - timedelta(hours=random.randint(1, 24))).isoformat(),
-            "location": "Field 3, North Section",
-            "initial_heart_rate": random.randint(150, 200),
-            "detected_anomaly": "Ventricular Tachycardia",
-            "alert_triggered_at": (datetime.now() - timedelta(hours=random.randint(1, 24), minutes=random.randint(1, 10))).isoformat(),
-        },
-        "response_details": {
-            "first_responder": "Coach Sarah Smith",
-            "response_time_seconds": random.randint(30, 180),
-            "cpr_initiated": random.choice([True, False]),
-            "aed_used": random.choice([True, False]),
-            "emergency_services_called": random.choice([True, False]),
-            "emergency_services_arrival_time": random.randint(300, 900)
-        },
-        "outcome": {
-            "status": random.choice(["Recovered", "Hospitalized", "Critical"]),
-            "notes": "Athlete was stabilized on-site and transported to Memorial Hospital."
-        },
-        "follow_up_actions": [
-            "Schedule cardiac evaluation",
-            "Review emergency response protocol",
-            "Update athlete medical records"
-        ]
-    }
+    return {"job_id": job.id, "status": job.status, "message": "Incident report generation queued"}
+
+@router.get("/jobs/{job_id}")
+async def get_report_job(
+    job_id: str,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Get the status of an incident report generation job"""
+    # Check if user has permission (coach or referee)
+    if current_user.role not in [UserRole.coach, UserRole.referee]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only coaches and referees can access incident reports"
+        )
     
-    # Store the report
-    incident_reports[report_id] = report
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
     
-    return {"report_id": report_id, "message": "Incident report generated successfully"}
+    result = job.to_dict()
+    # The job result is the generated report ID
+    result["report_id"] = result.pop("result")
+    return result
 
 @router.get("/list")
-async def list_incident_reports(current_user: TokenData = Depends(get_current_user)):
-    """List all incident reports accessible to the current user"""
+def list_incident_reports(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """List incident reports accessible to the current user, most recent incident first"""
     # Check if user has permission (coach or referee)
     if current_user.role not in [UserRole.coach, UserRole.referee]:
         raise HTTPException(
@@ -103,24 +98,61 @@ async def list_incident_reports(current_user: TokenData = Depends(get_current_us
             detail="Only coaches and referees can access incident reports"
         )
     
+    list_cursor = None
+    if cursor:
+        try:
+            list_cursor = incident_report_service.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
     # In a real app, we would filter reports based on the user's team/organization
-    # For now, return all mock reports
-    reports_list = [
-        {
-            "id": report_id,
-            "emergency_id": report["emergency_id"],
-            "athlete_name": report["athlete_data"]["name"],
-            "incident_date": report["incident_details"]["timestamp"],
-            "status": report["outcome"]["status"]
-        }
-        for report_id, report in incident_reports.items()
-    ]
+    reports, next_cursor = incident_report_service.list_incident_reports(
+        db, status=status_filter, start=start, end=end, limit=limit, cursor=list_cursor
+    )
+    
+    return {
+        "reports": [incident_report_service.summarize(report) for report in reports],
+        "next_cursor": incident_report_service.encode_cursor(next_cursor) if next_cursor else None
+    }
+
+@router.get("/export")
+async def export_incident_reports(
+    export_format: str = Query("ndjson", alias="format"),
+    status_filter: Optional[str] = Query(None, alias="status"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False,
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Stream all matching incident reports as NDJSON or CSV"""
+    # Check if user has permission (coach or referee)
+    if current_user.role not in [UserRole.coach, UserRole.referee]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only coaches and referees can export incident reports"
+        )
+    
+    if export_format not in incident_report_service.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
     
-    return {"reports": reports_list}
+    media_type = "application/x-ndjson" if export_format == "ndjson" else "text/csv"
+    headers = {"Content-Disposition": f'attachment; filename="incident-reports.{export_format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    
+    # No Content-Length is set, so the body is sent with chunked transfer encoding
+    return StreamingResponse(
+        incident_report_service.export_incident_reports(
+            export_format, status=status_filter, start=start, end=end, compress=gzip
+        ),
+        media_type=media_type,
+        headers=headers
+    )
 
 @router.get("/{report_id}")
-async def get_incident_report(
+def get_incident_report(
     report_id: str,
+    db: Session = Depends(get_db),
     current_user: TokenData = Depends(get_current_user)
 ):
     """Get a specific incident report by ID"""
@@ -132,10 +164,11 @@ async def get_incident_report(
         )
     
     # Check if the report exists
-    if report_id not in incident_reports:
+    db_report = incident_report_service.get_incident_report(db, report_id)
+    if db_report is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Incident report not found"
         )
     
-    return incident_reports[report_id]
\ No newline at end of file
+    return db_report.report
\ No newline at end of file
@@ -1,11 +1,14 @@
 import sys
 import os
 
-# Ajoutez le répertoire racine au path Python
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Ajoutez le répertoire backend au path Python
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Les tables sont créées par `python init_db.py` au déploiement, pas à chaque démarrage à froid
+os.environ.setdefault("DB_AUTO_CREATE", "false")
 
 # Importez votre application principale
-from main import app
+from app.main import app
 
 # Handler pour Vercel
 handler = app
\ No newline at end of file
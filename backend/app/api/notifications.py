@@ -1,12 +1,14 @@
 # app/api/notifications.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime, timedelta
 from pydantic import BaseModel
-import uuid
 
+from ..database import get_db
 from ..dependencies import get_current_user
 from ..models.user import User, UserRole
+from ..services import notification_service
+from ..services.notification_push_service import notification_pusher
 
 router = APIRouter(
     prefix="/notifications",
@@ -40,158 +42,149 @@ class NotificationPreferences(BaseModel):
     training_alerts: bool = True
     emergency_drills: bool = True
 
-# In-memory storage for notifications (would be a database in production)
-notifications_db = {}
-# In-memory storage for user notification preferences (would be a database in production)
-user_preferences = {}
+class NotificationPage(BaseModel):
+    notifications: List[NotificationResponse]
+    next_cursor: Optional[str] = None  # Pass back as `cursor` to get the next page
+
+class UnreadCountResponse(BaseModel):
+    unread_count: int
 
 @router.post("/", response_model=NotificationResponse, status_code=status.HTTP_201_CREATED)
-def create_notification(notification: NotificationCreate, current_user: User = Depends(get_current_user)):
+def create_notification(
+    notification: NotificationCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     # Only coaches and referees can create notifications
-    if current_user.role not in [UserRole.COACH, UserRole.REFEREE]:
+    if current_user.role not in [UserRole.coach, UserRole.referee]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to create notifications"
         )
     
-    notification_id = str(uuid.uuid4())
-    now = datetime.now().isoformat()
-    
-    new_notification = {
-        "id": notification_id,
-        "title": notification.title,
-        "message": notification.message,
-        "type": notification.type,
-        "date": now,
-        "created_by": current_user.id,
-        "target_roles": notification.target_roles,
-        "target_user_ids": notification.target_user_ids,
-    }
+    try:
+        target_user_ids = [int(user_id) for user_id in notification.target_user_ids or []]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="target_user_ids must be user IDs")
     
-    # Store in our mock database
-    if "notifications" not in notifications_db:
-        notifications_db["notifications"] = []
-    
-    notifications_db["notifications"].append(new_notification)
-    
-    return NotificationResponse(
-        id=notification_id,
+    # Store the notification and fan it out to its audience indexes
+    db_notification = notification_service.create_notification(
+        db,
         title=notification.title,
         message=notification.message,
         type=notification.type,
-        date=now,
+        created_by=current_user.id,
+        target_roles=notification.target_roles,
+        target_user_ids=target_user_ids
+    )
+    
+    response = NotificationResponse(
+        id=db_notification.id,
+        title=db_notification.title,
+        message=db_notification.message,
+        type=db_notification.type,
+        date=db_notification.created_at.isoformat(),
         read=False
     )
+    
+    # Push to connected users once the response is sent
+    background_tasks.add_task(
+        notification_pusher.push, response.model_dump(), notification.target_roles, target_user_ids
+    )
+    
+    return response
 
-@router.get("/", response_model=List[NotificationResponse])
-def get_notifications(current_user: User = Depends(get_current_user)):
-    if "notifications" not in notifications_db:
-        return []
-    
-    # Filter notifications relevant to this user based on role and user ID
-    user_notifications = []
-    for notification in notifications_db["notifications"]:
-        # Check if this notification is for all users
-        if not notification.get("target_roles") and not notification.get("target_user_ids"):
-            user_notifications.append(notification)
-        # Check if this notification targets the user's role
-        elif notification.get("target_roles") and current_user.role in notification.get("target_roles"):
-            user_notifications.append(notification)
-        # Check if this notification targets the user specifically
-        elif notification.get("target_user_ids") and current_user.id in notification.get("target_user_ids"):
-            user_notifications.append(notification)
-    
-    # Get user's read status for notifications
-    user_read_status = {}
-    if "read_status" in notifications_db and current_user.id in notifications_db["read_status"]:
-        user_read_status = notifications_db["read_status"][current_user.id]
+@router.get("/", response_model=NotificationPage)
+def get_notifications(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    feed_cursor = None
+    if cursor:
+        try:
+            feed_cursor = notification_service.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    
+    # Read one page from the broadcast, role and user indexes for this user, newest first
+    user_notifications, next_cursor = notification_service.get_feed(
+        db, current_user.id, current_user.role.value, limit=limit, cursor=feed_cursor
+    )
+    
+    # Resolve read state for this page only
+    read_seqs = notification_service.get_read_seqs(db, current_user.id, user_notifications)
     
     # Format the response
     result = []
     for notification in user_notifications:
-        is_read = user_read_status.get(notification["id"], False)
         result.append(NotificationResponse(
-            id=notification["id"],
-            title=notification["title"],
-            message=notification["message"],
-            type=notification["type"],
-            date=notification["date"],
-            read=is_read
+            id=notification.id,
+            title=notification.title,
+            message=notification.message,
+            type=notification.type,
+            date=notification.created_at.isoformat(),
+            read=notification.seq in read_seqs
         ))
     
-    # Sort by date, newest first
-    result.sort(key=lambda x: x.date, reverse=True)
-    
-    return result
+    return NotificationPage(
+        notifications=result,
+        next_cursor=notification_service.encode_cursor(next_cursor) if next_cursor else None
+    )
 
 @router.post("/{notification_id}/read")
-def mark_notification_read(notification_id: str, current_user: User = Depends(get_current_user)):
-    # Initialize read_status structure if it doesn't exist
-    if "read_status" not in notifications_db:
-        notifications_db["read_status"] = {}
-    
-    if current_user.id not in notifications_db["read_status"]:
-        notifications_db["read_status"][current_user.id] = {}
-    
+def mark_notification_read(
+    notification_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     # Mark the notification as read
-    notifications_db["read_status"][current_user.id][notification_id] = True
+    if not notification_service.mark_read(db, notification_id, current_user.id, current_user.role.value):
+        raise HTTPException(status_code=404, detail="Notification not found")
     
     return {"status": "success"}
 
 @router.post("/read-all")
-def mark_all_notifications_read(current_user: User = Depends(get_current_user)):
-    if "notifications" not in notifications_db:
-        return {"status": "success"}
-    
-    # Initialize read_status structure if it doesn't exist
-    if "read_status" not in notifications_db:
-        notifications_db["read_status"] = {}
-    
-    if current_user.id not in notifications_db["read_status"]:
-        notifications_db["read_status"][current_user.id] = {}
-    
-    # Get all notifications relevant to this user
-    user_notifications = []
-    for notification in notifications_db["notifications"]:
-        # Check if this notification is for all users
-        if not notification.get("target_roles") and not notification.get("target_user_ids"):
-            user_notifications.append(notification)
-        # Check if this notification targets the user's role
-        elif notification.get("target_roles") and current_user.role in notification.get("target_roles"):
-            user_notifications.append(notification)
-        # Check if this notification targets the user specifically
-        elif notification.get("target_user_ids") and current_user.id in notification.get("target_user_ids"):
-            user_notifications.append(notification)
-    
-    # Mark all as read
-    for notification in user_notifications:
-        notifications_db["read_status"][current_user.id][notification["id"]] = True
+def mark_all_notifications_read(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Move the user's read watermark past every notification sent so far
+    notification_service.mark_all_read(db, current_user.id, current_user.role.value)
     
     return {"status": "success"}
 
+@router.get("/unread-count", response_model=UnreadCountResponse)
+def get_unread_count(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return UnreadCountResponse(
+        unread_count=notification_service.unread_count(db, current_user.id, current_user.role.value)
+    )
+
 @router.get("/preferences", response_model=NotificationPreferences)
-def get_notification_preferences(current_user: User = Depends(get_current_user)):
-    # Return default preferences if none are set
-    if current_user.id not in user_preferences:
-        return NotificationPreferences()
-    
-    return NotificationPreferences(**user_preferences[current_user.id])
+def get_notification_preferences(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    # Defaults are returned if none are set
+    return NotificationPreferences(**notification_service.get_preferences(db, current_user.id))
 
 @router.post("/preferences", response_model=NotificationPreferences)
 def update_notification_preferences(
     preferences: NotificationPreferences, 
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     # Update user preferences
-    user_preferences[current_user.id] = preferences.dict()
+    updated = notification_service.update_preferences(db, current_user.id, preferences.model_dump())
+    notification_pusher.set_preferences(current_user.id, updated)
     
-    return preferences
+    return NotificationPreferences(**updated)
 
 # Endpoint to generate monthly reminder notifications
 @router.post("/generate-monthly-reminders")
-def generate_monthly_reminders(current_user: User = Depends(get_current_user)):
+def generate_monthly_reminders(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
     # Only coaches can generate monthly reminders
-    if current_user.role != UserRole.COACH:
+    if current_user.role != UserRole.coach:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only coaches can generate monthly reminders"
@@ -202,10 +195,10 @@ def generate_monthly_reminders(current_user: User = Depends(get_current_user)):
         title="Monthly CPR Protocol Review",
         message="It's time for your monthly review of CPR protocols. Please complete the review by the end of the week.",
         type=NotificationType.REMINDER,
-        target_roles=[UserRole.ATHLETE, UserRole.TEAMMATE]
+        target_roles=[UserRole.athlete.value, UserRole.teammate.value]
     )
     
-    create_notification(notification, current_user)
+    create_notification(notification, background_tasks, db, current_user)
     
     return {"status": "success", "message": "Monthly reminders generated successfully"}
 
@@ -214,10 +207,12 @@ def generate_monthly_reminders(current_user: User = Depends(get_current_user)):
 def send_protocol_update(
     title: str,
     message: str,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     # Only coaches can send protocol updates
-    if current_user.role != UserRole.COACH:
+    if current_user.role != UserRole.coach:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only coaches can send protocol updates"
@@ -230,6 +225,6 @@ def send_protocol_update(
         type=NotificationType.UPDATE
     )
     
-    create_notification(notification, current_user)
+    create_notification(notification, background_tasks, db, current_user)
     
     return {"status": "success", "message": "Protocol update sent successfully"}
\ No newline at end of file
@@ -1,27 +1,157 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql import Select
+import asyncio
+import itertools
+import logging
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from app.services.metrics import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables from the backend directory if not already set. Deployed
+# environments (Vercel) set DATABASE_URL themselves, so a cold start skips the .env lookup;
+# a local `uvicorn app.main:app` still picks up backend/.env
+if "DATABASE_URL" not in os.environ:
+    load_dotenv(Path(__file__).parent.parent / ".env")
 
 # Database configuration
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./stomp.db")
+# Optional comma-separated read replicas; reads are routed to them when set
+REPLICA_DATABASE_URLS = [url.strip() for url in os.environ.get("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+# Seconds between health checks of a replica
+REPLICA_HEALTH_CHECK_SECONDS = float(os.environ.get("REPLICA_HEALTH_CHECK_SECONDS", 5))
+# Connect timeout of a replica health check, so an unreachable replica is marked down quickly
+REPLICA_CONNECT_TIMEOUT_SECONDS = int(os.environ.get("REPLICA_CONNECT_TIMEOUT_SECONDS", 2))
+# Create missing tables when the app is imported. Serverless entry points turn this off and
+# rely on `python init_db.py` having been run, so a cold start does not pay for the schema check
+DB_AUTO_CREATE = os.environ.get("DB_AUTO_CREATE", "true").lower() in ("1", "true", "yes")
+
+def _create_engine(url: str):
+    return create_engine(
+        url,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
 
 # Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = _create_engine(DATABASE_URL)
+instrument_engine(engine, "primary")
+
+class Replica:
+    """A read replica engine with a health flag kept current by check_replicas_periodically"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.engine = _create_engine(url)
+        instrument_engine(self.engine, "replica")
+        # Checks open a fresh connection with a short connect timeout, outside the request pool
+        self._check_engine = create_engine(
+            url,
+            poolclass=NullPool,
+            connect_args={} if "sqlite" in url else {"connect_timeout": REPLICA_CONNECT_TIMEOUT_SECONDS},
+        )
+        # Out of rotation until its first health check passes
+        self.healthy = False
+        # A dropped connection takes the replica out of rotation until the next check
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def _on_error(self, context) -> None:
+        if context.is_disconnect:
+            self.healthy = False
+
+    def check(self) -> bool:
+        """Run SELECT 1 against the replica and update the health flag; blocking"""
+        try:
+            with self._check_engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            healthy = True
+        except Exception:
+            logger.warning("Read replica %s failed its health check", self.engine.url)
+            healthy = False
+        self.healthy = healthy
+        return healthy
+
+replicas = [Replica(url) for url in REPLICA_DATABASE_URLS]
+_replica_cycle = itertools.count()
+
+def pick_replica():
+    """Next healthy replica engine in round-robin order, or None to use the primary"""
+    for _ in range(len(replicas)):
+        replica = replicas[next(_replica_cycle) % len(replicas)]
+        if replica.healthy:
+            return replica.engine
+    return None
+
+async def check_replicas_periodically(interval: float = REPLICA_HEALTH_CHECK_SECONDS) -> None:
+    """Health-check every replica in worker threads every interval seconds, until cancelled"""
+    while True:
+        await asyncio.gather(*(asyncio.to_thread(replica.check) for replica in replicas))
+        await asyncio.sleep(interval)
+
+class RoutingSession(Session):
+    """Sends ORM SELECTs to a read replica and everything else to the primary.
+
+    Once the session has written (a flush, or any non-SELECT statement) it
+    stays on the primary for the rest of its life, so a request always reads
+    its own writes. Call use_primary() for reads that must not be stale;
+    every read-modify-write service does so before its first read.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._primary_only = not replicas
+
+    def use_primary(self) -> None:
+        self._primary_only = True
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._primary_only:
+            return engine
+        if self._flushing or not isinstance(clause, Select):
+            self._primary_only = True
+            return engine
+        return pick_replica() or engine
+
+# Connections opened at startup so the first requests do not pay for connecting
+DB_POOL_WARM_CONNECTIONS = int(os.environ.get("DB_POOL_WARM_CONNECTIONS", 2))
+
+def warm_pool(connections: int = DB_POOL_WARM_CONNECTIONS) -> None:
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = engine.connect()
+            opened.append(connection)
+            connection.execute(text("SELECT 1"))
+    finally:
+        # Closing returns them to the pool, still open
+        for connection in opened:
+            connection.close()
+
+def check_database() -> bool:
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return True
+    except Exception:
+        logger.exception("Database readiness check failed")
+        return False
 
 # Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 # Create Base class for models
 Base = declarative_base()
 
+def init_db() -> None:
+    """Create any missing tables (typically done with Alembic in production)"""
+    import app.models  # noqa: F401 - registers every model on Base.metadata
+    Base.metadata.create_all(bind=engine)
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
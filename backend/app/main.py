@@ -1,18 +1,33 @@
 import sys
 import os
+import asyncio
+from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware # Import CORSMiddleware
-from app.api import auth, emergency_contacts, dashboard, emergency_alerts, incident_reports, emergency_simulations, notifications # Import all routers
-from app.database import engine, Base # Import engine and Base for DB creation
+from app.api import auth, emergency_contacts, dashboard, emergency_alerts, incident_reports, emergency_simulations, notifications, analytics # Import all routers
+from app.database import DB_AUTO_CREATE, init_db, check_database, warm_pool, replicas, check_replicas_periodically
 from app.dependencies import get_current_user
 from app.models.user import User
+from app.services.job_queue import report_jobs
+from app.services.emergency_alert_service import manager
+from app.services.task_supervisor import task_supervisor
+from app.services.simulation_store import simulation_store
+from app.services.emergency_event_log import event_log
+from app.services.vitals_store import vitals_store
+from app.services.emergency_recovery import recover_emergency_state
+from app.services.analytics_service import response_analytics
+from app.services.metrics import MetricsMiddleware, registry
+from app.services.request_profiler import ProfilerMiddleware
 
-# Create database tables (if they don't exist) - typically done with Alembic in production
-Base.metadata.create_all(bind=engine)
+# Create database tables (if they don't exist) unless schema creation is left to init_db.py
+if DB_AUTO_CREATE:
+    init_db()
 
-app = FastAPI(title="STOMP Backend API", version="0.1.0")
+# orjson serializes datetimes, UUIDs and dataclasses natively and is several times faster than stdlib json
+app = FastAPI(title="STOMP Backend API", version="0.1.0", default_response_class=ORJSONResponse)
 
 # CORS Middleware Configuration
 origins = [
@@ -35,6 +50,11 @@ app.add_middleware(
     allow_headers=["*"], # Allows all headers
 )
 
+# Per-route latency histograms for /metrics
+app.add_middleware(MetricsMiddleware)
+# Opt-in sampling profiler; a pass-through unless PROFILE_DEBUG_TOKEN or PROFILE_SAMPLE_RATE is set
+app.add_middleware(ProfilerMiddleware)
+
 # Include the API routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(emergency_contacts.router, prefix="/api/emergency-contacts", tags=["Emergency Contacts"])
@@ -43,12 +63,80 @@ app.include_router(emergency_alerts.router, prefix="/api/emergency-alerts", tags
 app.include_router(incident_reports.router, prefix="/api/incident-reports", tags=["Incident Reports"])
 app.include_router(emergency_simulations.router, prefix="/api/emergency-simulations", tags=["Emergency Simulations"])
 app.include_router(notifications.router, prefix="/api/notifications", tags=["Notifications"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+
+app.state.started = False
+
+@app.on_event("startup")
+def startup():
+    # Open pooled connections before traffic arrives
+    warm_pool()
+    # Restore active emergencies, responders and drills from the event log
+    recover_emergency_state()
+    app.state.started = True
+
+@app.on_event("startup")
+async def start_maintenance():
+    # Accept background tasks again if an earlier shutdown drained the supervisor
+    task_supervisor.start()
+    # Periodic housekeeping, cancelled on shutdown
+    app.state.maintenance_tasks = [
+        # Replay recent reports and archived drills into the analytics sketches without delaying startup;
+        # drills restored by recovery are already in them
+        asyncio.create_task(
+            asyncio.to_thread(response_analytics.backfill_recent, datetime.now(), simulation_store.ids()),
+            name="analytics_backfill",
+        ),
+        asyncio.create_task(vitals_store.compact_periodically(), name="vitals_compaction"),
+        # Completed drills leave memory once past the retention window, even when no other drill ends
+        asyncio.create_task(simulation_store.archive_periodically(), name="simulation_archive"),
+    ]
+    if replicas:
+        # Reads only consult the cached health flags, so an unreachable replica never blocks a request
+        app.state.maintenance_tasks.append(
+            asyncio.create_task(check_replicas_periodically(), name="replica_health_checks")
+        )
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.started = False
+    for task in app.state.maintenance_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.maintenance_tasks, return_exceptions=True)
+    # Let in-flight broadcasts finish, then stop background workers so the process can exit cleanly
+    await task_supervisor.drain()
+    # Tell WebSocket clients we are going away so they reconnect to another worker
+    await manager.close_all()
+    # Archive completed simulations still held in memory
+    await simulation_store.archive_expired(everything=True)
+    await report_jobs.stop()
+    # Write out buffered emergency events and vital sign samples before the process exits
+    await asyncio.to_thread(event_log.close)
+    await asyncio.to_thread(vitals_store.flush)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to STOMP Backend"}
 
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    """Readiness probe: startup finished, the database answers, and broadcasts are being accepted"""
+    checks = {
+        "startup": app.state.started,
+        "database": await asyncio.to_thread(check_database),
+        "broadcast": task_supervisor.accepting,
+    }
+    is_ready = all(checks.values())
+    return ORJSONResponse(
+        {"ready": is_ready, "checks": checks, "websocket_connections": manager.connection_total()},
+        status_code=200 if is_ready else 503,
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of the application metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
-    import uvicorn
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    from app.server import serve
+    serve()
\ No newline at end of file
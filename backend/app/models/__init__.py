@@ -1,2 +1,5 @@
 from .user import User, UserCreate, UserResponse, UserRole
-from .emergency_contact import EmergencyContact, EmergencyContactCreate, EmergencyContactResponse
\ No newline at end of file
+from .emergency_contact import EmergencyContact, EmergencyContactCreate, EmergencyContactResponse
+from .notification import Notification, NotificationRoleTarget, NotificationDelivery, NotificationRead, NotificationReadState, NotificationCounter, NotificationPreference
+from .incident_report import IncidentReport
+from .emergency_simulation import EmergencySimulation
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Index
+from app.database import Base
+
+# SQLAlchemy ORM Model
+class EmergencySimulation(Base):
+    """A completed simulation drill, archived once it leaves the in-memory retention window"""
+    __tablename__ = "emergency_simulations"
+
+    id = Column(String(36), primary_key=True)
+    initiated_by = Column(Integer, nullable=False)
+    team = Column(String, index=True, nullable=True)
+    athlete_name = Column(String, nullable=True)
+    start_time = Column(DateTime, index=True, nullable=False)
+    end_time = Column(DateTime, nullable=True)
+    duration_seconds = Column(Integer, nullable=True)
+    first_response_seconds = Column(Float, nullable=True)
+    # The full simulation document as returned by the API
+    simulation = Column(JSON, nullable=False)
+
+    __table_args__ = (
+        # A coach's drill history ordered by start time
+        Index("ix_emergency_simulations_initiated_by_start_time", "initiated_by", "start_time"),
+    )
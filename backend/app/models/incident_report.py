@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from app.database import Base
+
+# SQLAlchemy ORM Model
+class IncidentReport(Base):
+    __tablename__ = "incident_reports"
+
+    id = Column(String(36), primary_key=True)
+    emergency_id = Column(String, index=True, nullable=False)
+    athlete_id = Column(Integer, index=True, nullable=True)
+    athlete_name = Column(String, nullable=True)
+    outcome_status = Column(String, index=True, nullable=True)
+    incident_at = Column(DateTime, index=True, nullable=False)
+    generated_by = Column(Integer, nullable=True)
+    generated_at = Column(DateTime, nullable=False)
+    # The full report document as returned by the API
+    report = Column(JSON, nullable=False)
+
+    __table_args__ = (
+        # Status-filtered listings ordered by incident time
+        Index("ix_incident_reports_status_incident_at", "outcome_status", "incident_at"),
+    )
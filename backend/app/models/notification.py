@@ -0,0 +1,78 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
+from app.database import Base
+
+# SQLAlchemy ORM Models
+class Notification(Base):
+    __tablename__ = "notifications"
+
+    # Monotonic sequence used for feed ordering, cursors and read watermarks
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(String(36), unique=True, index=True, nullable=False)
+    title = Column(String, nullable=False)
+    message = Column(String, nullable=False)
+    type = Column(String, nullable=False)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    # True when the notification has no role or user targets
+    is_broadcast = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index("ix_notifications_broadcast_created", "is_broadcast", "created_at"),
+    )
+
+class NotificationRoleTarget(Base):
+    __tablename__ = "notification_role_targets"
+
+    id = Column(Integer, primary_key=True)
+    notification_seq = Column(Integer, ForeignKey("notifications.seq"), nullable=False)
+    role = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_notification_role_targets_role_created", "role", "created_at"),
+    )
+
+class NotificationDelivery(Base):
+    """One row per user for notifications sent to specific users"""
+    __tablename__ = "notification_deliveries"
+
+    id = Column(Integer, primary_key=True)
+    notification_seq = Column(Integer, ForeignKey("notifications.seq"), nullable=False)
+    user_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_notification_deliveries_user_created", "user_id", "created_at"),
+    )
+
+class NotificationRead(Base):
+    """Notifications read individually above the user's read watermark"""
+    __tablename__ = "notification_reads"
+
+    user_id = Column(Integer, primary_key=True)
+    notification_seq = Column(Integer, ForeignKey("notifications.seq"), primary_key=True)
+
+class NotificationReadState(Base):
+    __tablename__ = "notification_read_states"
+
+    user_id = Column(Integer, primary_key=True)
+    # Highest sequence covered by the last "mark all as read"
+    read_upto_seq = Column(Integer, nullable=False, default=0)
+    # How many notifications were visible to the user at that watermark
+    read_upto_count = Column(Integer, nullable=False, default=0)
+
+class NotificationCounter(Base):
+    """Audience sizes maintained on create, e.g. 'all', 'role:coach', 'user:5'"""
+    __tablename__ = "notification_counters"
+
+    key = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class NotificationPreference(Base):
+    __tablename__ = "notification_preferences"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    monthly_reminders = Column(Boolean, nullable=False, default=True)
+    protocol_updates = Column(Boolean, nullable=False, default=True)
+    training_alerts = Column(Boolean, nullable=False, default=True)
+    emergency_drills = Column(Boolean, nullable=False, default=True)
@@ -0,0 +1,133 @@
+import importlib.util
+import logging
+import os
+import sys
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Process launcher. Development runs one auto-reloading uvicorn process;
+# production runs under gunicorn with the app preloaded, falling back to
+# uvicorn's own process manager where gunicorn is unavailable.
+#
+# Production defaults to a single worker: WebSocket connections, active
+# emergencies and drills, the report job queue, rate-limit buckets, analytics
+# and push preferences all live in the process, so a second worker would miss
+# alerts and answer 404 for state held by its sibling. More workers are an
+# explicit opt-in until that state is shared.
+
+SERVER_MODE = os.environ.get("SERVER_MODE", "development")
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", 8000))
+# Platforms often set WEB_CONCURRENCY on their own, so more than one worker also needs this flag
+ALLOW_MULTIPLE_WORKERS = os.environ.get("ALLOW_MULTIPLE_WORKERS", "false").lower() in ("1", "true", "yes")
+# One worker unless multiple workers are allowed, then one per core
+WORKERS = int(os.environ.get("WEB_CONCURRENCY", (os.cpu_count() or 1) if ALLOW_MULTIPLE_WORKERS else 1))
+# Longer than a typical load balancer idle timeout (60s), so the balancer closes idle connections first
+KEEP_ALIVE_SECONDS = int(os.environ.get("KEEP_ALIVE_SECONDS", 75))
+BACKLOG = int(os.environ.get("BACKLOG", 2048))
+# Time in-flight requests and background broadcasts get to finish on shutdown
+GRACEFUL_TIMEOUT_SECONDS = int(os.environ.get("GRACEFUL_TIMEOUT_SECONDS", 30))
+# Recycle workers after this many requests (0 disables), with jitter so they do not restart together
+MAX_REQUESTS = int(os.environ.get("MAX_REQUESTS", 0))
+
+APP = "app.main:app"
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def event_loop_options() -> Dict[str, str]:
+    """uvloop and httptools when installed (uvicorn[standard]), the pure-Python defaults otherwise"""
+    return {
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+    }
+
+
+def run_development() -> None:
+    import uvicorn
+
+    uvicorn.run(APP, host=HOST, port=PORT, reload=True)
+
+
+def _post_fork(server, worker) -> None:
+    # Connections opened while preloading belong to the master; each worker opens its own
+    from app.database import engine, replicas
+
+    engine.dispose(close=False)
+    for replica in replicas:
+        replica.engine.dispose(close=False)
+
+
+def run_gunicorn(workers: int) -> None:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class TunedUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {**event_loop_options(), "timeout_graceful_shutdown": GRACEFUL_TIMEOUT_SECONDS}
+
+    options: Dict[str, Any] = {
+        "bind": f"{HOST}:{PORT}",
+        "workers": workers,
+        "worker_class": TunedUvicornWorker,
+        "preload_app": True,
+        "keepalive": KEEP_ALIVE_SECONDS,
+        "backlog": BACKLOG,
+        "graceful_timeout": GRACEFUL_TIMEOUT_SECONDS,
+        "timeout": GRACEFUL_TIMEOUT_SECONDS * 2,
+        "max_requests": MAX_REQUESTS,
+        "max_requests_jitter": MAX_REQUESTS // 10,
+        "post_fork": _post_fork,
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Application().run()
+
+
+def run_production(workers: int = WORKERS) -> None:
+    if workers > 1 and not ALLOW_MULTIPLE_WORKERS:
+        logger.warning(
+            "WEB_CONCURRENCY=%d ignored: emergency state is per process, so alerts would miss clients on other "
+            "workers. Set ALLOW_MULTIPLE_WORKERS=true to run several workers anyway.", workers
+        )
+        workers = 1
+    elif workers > 1:
+        # ConnectionManager is per process: an alert reaches the sockets held by the worker that raised it
+        logger.warning(
+            "Running %d workers; WebSocket alerts are only delivered to clients connected to the same worker", workers
+        )
+    if _available("gunicorn") and sys.platform != "win32":
+        run_gunicorn(workers)
+        return
+
+    import uvicorn
+
+    logger.warning("gunicorn is not installed; starting uvicorn workers without app preloading")
+    uvicorn.run(
+        APP,
+        host=HOST,
+        port=PORT,
+        workers=workers,
+        backlog=BACKLOG,
+        timeout_keep_alive=KEEP_ALIVE_SECONDS,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT_SECONDS,
+        limit_max_requests=MAX_REQUESTS or None,
+        **event_loop_options(),
+    )
+
+
+def serve(mode: str = SERVER_MODE) -> None:
+    if mode == "production":
+        run_production()
+    else:
+        run_development()
@@ -0,0 +1,265 @@
+import logging
+import math
+import os
+import threading
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.emergency_simulation import EmergencySimulation as EmergencySimulationModel
+from app.models.incident_report import IncidentReport as IncidentReportModel
+
+# Response-time analytics kept as streaming sketches. Every incident report and
+# drill updates the sketch for its (team, day) window as it arrives; queries
+# merge the windows they cover instead of scanning stored records.
+#
+# The sketches live in each process. After startup a background task replays
+# the last ANALYTICS_BACKFILL_DAYS of stored reports and archived drills, and
+# recovery adds the drills restored from the event log. With several workers,
+# a report or drill handled by one worker reaches the others' sketches only
+# when they restart.
+
+logger = logging.getLogger(__name__)
+
+# How far back stored reports and archived drills are replayed after startup; 0 disables the backfill
+ANALYTICS_BACKFILL_DAYS = float(os.environ.get("ANALYTICS_BACKFILL_DAYS", 30))
+
+QUANTILES = (0.5, 0.9, 0.99)
+DEFAULT_TEAM = "unassigned"
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style).
+
+    Positive values are counted in logarithmic buckets, so any quantile is
+    within relative_accuracy of the true value and memory grows with the
+    log of the value range, not with the number of samples.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self._zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        value = max(0.0, float(value))
+        if value == 0:
+            self._zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for index, count in other._buckets.items():
+            self._buckets[index] = self._buckets.get(index, 0) + count
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self._zero_count:
+            return 0.0
+        seen = self._zero_count
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket, clamped to the observed range
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        result = {"count": self.count}
+        for q in QUANTILES:
+            value = self.quantile(q)
+            result[f"p{int(q * 100)}"] = round(value, 2) if value is not None else None
+        result["mean"] = round(self.sum / self.count, 2) if self.count else None
+        return result
+
+
+class WindowStats:
+    """Counters and sketches for one team over one day"""
+
+    def __init__(self):
+        self.response_times = QuantileSketch()
+        self.drill_response_times = QuantileSketch()
+        self.drill_durations = QuantileSketch()
+        self.incidents = 0
+        self.cpr_initiated = 0
+        self.aed_used = 0
+
+    def merge(self, other: "WindowStats") -> None:
+        self.response_times.merge(other.response_times)
+        self.drill_response_times.merge(other.drill_response_times)
+        self.drill_durations.merge(other.drill_durations)
+        self.incidents += other.incidents
+        self.cpr_initiated += other.cpr_initiated
+        self.aed_used += other.aed_used
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "incidents": self.incidents,
+            "response_time_seconds": self.response_times.summary(),
+            "cpr_usage_rate": round(self.cpr_initiated / self.incidents, 3) if self.incidents else None,
+            "aed_usage_rate": round(self.aed_used / self.incidents, 3) if self.incidents else None,
+            "drills": self.drill_durations.count,
+            "drill_duration_seconds": self.drill_durations.summary(),
+            "drill_response_time_seconds": self.drill_response_times.summary(),
+        }
+
+
+def _day(value: Any) -> date:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.now().date()
+
+
+class ResponseAnalytics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple[str, date], WindowStats] = {}
+        # False until the startup backfill has finished; summaries may be partial before that
+        self.backfilled = False
+
+    def _window(self, team: Optional[str], when: Any) -> WindowStats:
+        key = (team or DEFAULT_TEAM, _day(when))
+        stats = self._windows.get(key)
+        if stats is None:
+            stats = self._windows[key] = WindowStats()
+        return stats
+
+    def record_incident(self, report: Dict[str, Any]) -> None:
+        """Fold one incident report into its team/day window"""
+        response = report.get("response_details", {})
+        with self._lock:
+            stats = self._window(
+                report.get("athlete_data", {}).get("team"),
+                report.get("incident_details", {}).get("timestamp"),
+            )
+            stats.incidents += 1
+            if response.get("response_time_seconds") is not None:
+                stats.response_times.add(response["response_time_seconds"])
+            if response.get("cpr_initiated"):
+                stats.cpr_initiated += 1
+            if response.get("aed_used"):
+                stats.aed_used += 1
+
+    def record_drill(self, team: Optional[str], started_at: Any, duration_seconds: float) -> None:
+        with self._lock:
+            self._window(team, started_at).drill_durations.add(duration_seconds)
+
+    def record_drill_response(self, team: Optional[str], started_at: Any, response_seconds: float) -> None:
+        with self._lock:
+            self._window(team, started_at).drill_response_times.add(response_seconds)
+
+    def record_simulation(self, simulation: Dict[str, Any]) -> None:
+        """Fold a stored or recovered drill: its response times, and its duration once completed"""
+        with self._lock:
+            stats = self._window(simulation.get("team"), simulation.get("start_time"))
+            for elapsed in (simulation.get("response_times") or {}).values():
+                stats.drill_response_times.add(elapsed)
+            if simulation.get("duration_seconds") is not None:
+                stats.drill_durations.add(simulation["duration_seconds"])
+
+    def summary(
+        self, team: Optional[str] = None, start: Optional[Any] = None, end: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """Merge the windows in [start, end] per team; cost depends on teams x days, not records"""
+        start_day = _day(start) if start is not None else None
+        end_day = _day(end) if end is not None else None
+        per_team: Dict[str, WindowStats] = {}
+        with self._lock:
+            for (window_team, window_day), stats in self._windows.items():
+                if team is not None and window_team != team:
+                    continue
+                if start_day is not None and window_day < start_day:
+                    continue
+                if end_day is not None and window_day > end_day:
+                    continue
+                merged = per_team.get(window_team)
+                if merged is None:
+                    merged = per_team[window_team] = WindowStats()
+                merged.merge(stats)
+        overall = WindowStats()
+        for stats in per_team.values():
+            overall.merge(stats)
+        return {
+            "overall": overall.to_dict(),
+            "teams": {name: stats.to_dict() for name, stats in sorted(per_team.items())},
+        }
+
+    def backfill(
+        self,
+        db: Session,
+        until: datetime,
+        since: Optional[datetime] = None,
+        skip_simulation_ids: Iterable[str] = (),
+    ) -> int:
+        """Fold stored incident reports and archived drills from before until into the sketches.
+
+        Reports generated and drills ended after until were recorded live, and
+        drills in skip_simulation_ids were restored by recovery, so neither is
+        counted twice. since bounds the scan to a recent window.
+        """
+        skip = set(skip_simulation_ids)
+        count = 0
+        query = select(IncidentReportModel.report).where(IncidentReportModel.generated_at < until)
+        if since is not None:
+            query = query.where(IncidentReportModel.incident_at >= since)
+        for report in db.scalars(query.execution_options(yield_per=500)):
+            self.record_incident(report)
+            count += 1
+        query = select(EmergencySimulationModel.id, EmergencySimulationModel.simulation).where(
+            EmergencySimulationModel.end_time < until
+        )
+        if since is not None:
+            query = query.where(EmergencySimulationModel.start_time >= since)
+        for simulation_id, simulation in db.execute(query.execution_options(yield_per=500)):
+            if simulation_id not in skip:
+                self.record_simulation(simulation)
+                count += 1
+        return count
+
+    def backfill_recent(
+        self, until: datetime, skip_simulation_ids: Iterable[str] = (), days: float = ANALYTICS_BACKFILL_DAYS
+    ) -> int:
+        """Backfill the last days days in a session of its own; runs in a worker thread after startup"""
+        count = 0
+        try:
+            if days > 0:
+                db = SessionLocal()
+                try:
+                    count = self.backfill(db, until, until - timedelta(days=days), skip_simulation_ids)
+                finally:
+                    db.close()
+                logger.info("Backfilled response analytics from %d stored reports and drills", count)
+        except Exception:
+            logger.exception("Response analytics backfill failed")
+        finally:
+            self.backfilled = True
+        return count
+
+# Create a global instance of the response analytics
+response_analytics = ResponseAnalytics()
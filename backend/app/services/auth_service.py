@@ -1,12 +1,13 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
 from pydantic import BaseModel
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from app.services.metrics import auth_decode_duration
+
 # Load environment variables from the backend directory if not already set
 SECRET_KEY = os.environ.get("JWT_SECRET_KEY")
 if not SECRET_KEY:
@@ -22,7 +23,18 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib and python-jose (with its cryptography backend) are imported on first use rather
+# than at import time, so serverless cold starts that never touch them do not pay for them
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def _jose():
+    from jose import JWTError, jwt
+    return jwt, JWTError
 
 class TokenData(BaseModel):
     email: Optional[str] = None
@@ -30,10 +42,10 @@ class TokenData(BaseModel):
     role: Optional[str] = None
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -42,10 +54,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    jwt, _ = _jose()
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def decode_access_token(token: str) -> Optional[TokenData]:
+    with auth_decode_duration.time():
+        return _decode_access_token(token)
+
+def _decode_access_token(token: str) -> Optional[TokenData]:
+    jwt, JWTError = _jose()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: Optional[str] = payload.get("sub")
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.services.auth_service import create_access_token
+from app.services.emergency_alert_service import manager, decode_frame
+from app.services.task_supervisor import task_supervisor
+
+# End-to-end load test for the alert path. Simulated emergencies are started
+# through POST /api/emergency-simulations/start with raw in-process ASGI calls,
+# and fake WebSocket clients registered on the connection manager timestamp
+# every alert frame they receive.
+
+START_PATH = "/api/emergency-simulations/start"
+END_PATH = "/api/emergency-simulations/end/{simulation_id}"
+ROLES = ("athlete", "coach", "referee", "teammate")
+LOAD_COACH_ID = 900000
+
+
+class LoadClient:
+    """Stands in for a WebSocket on the connection manager and records alert arrival times"""
+
+    def __init__(
+        self,
+        user_id: str,
+        role: str,
+        run: "DrillLoadRun",
+        send_delay: float = 0.0,
+        encoding: str = "json",
+        compression: Optional[str] = None,
+    ):
+        self.user_id = user_id
+        self.role = role
+        self.run = run
+        self.send_delay = send_delay
+        self.encoding = encoding
+        self.compression = compression
+        self.frames = 0
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        if self.send_delay:
+            # A slow client holds up the broadcast loop just like a congested socket
+            await asyncio.sleep(self.send_delay)
+        self.frames += 1
+        if message.get("type") == "emergency_alert":
+            # Simulation alerts wrap the emergency in the broadcast payload
+            data = message.get("data", {})
+            self.run.delivered(data.get("emergency", data).get("athlete_name"), self)
+
+    async def send_text(self, data: str) -> None:
+        await self.send_json(json.loads(data))
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self.send_json(decode_frame(data, self.encoding, self.compression))
+
+
+class DrillLoadRun:
+    """Trigger times and per-recipient delivery latencies for one load run"""
+
+    def __init__(self):
+        self.triggered_at: Dict[str, float] = {}
+        self.expected: Dict[str, int] = {}
+        self.received: Dict[str, int] = {}
+        self.latencies: List[float] = []
+        self.duplicates = 0
+        self._seen: set = set()
+        self._all_delivered = asyncio.Event()
+        self._outstanding = 0
+
+    def trigger(self, marker: str, recipients: int) -> None:
+        self.triggered_at[marker] = time.perf_counter()
+        self.expected[marker] = recipients
+        self.received[marker] = 0
+        self._outstanding += recipients
+        self._all_delivered.clear()
+
+    def cancel(self, marker: str) -> None:
+        # The trigger was rejected, so nothing is expected for it
+        self._outstanding -= self.expected[marker] - self.received[marker]
+        self.expected[marker] = self.received[marker]
+        if self._outstanding <= 0:
+            self._all_delivered.set()
+
+    def delivered(self, marker: Optional[str], client: LoadClient) -> None:
+        started = self.triggered_at.get(marker)
+        if started is None:
+            return
+        key = (marker, client.user_id, client.role)
+        if key in self._seen:
+            self.duplicates += 1
+            return
+        self._seen.add(key)
+        self.latencies.append(time.perf_counter() - started)
+        self.received[marker] += 1
+        self._outstanding -= 1
+        if self._outstanding <= 0:
+            self._all_delivered.set()
+
+    async def wait(self, timeout: float) -> bool:
+        if self._outstanding <= 0:
+            return True
+        try:
+            await asyncio.wait_for(self._all_delivered.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+async def asgi_request(app, method: str, path: str, body: Dict[str, Any], token: str) -> Tuple[int, Dict[str, Any]]:
+    """Call the ASGI app directly, without sockets or an HTTP client"""
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"loadgen"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            (b"authorization", f"Bearer {token}".encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("loadgen", 80),
+    }
+    request_sent = False
+    status_code = 500
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # Nothing else to read; wait like a client that keeps the connection open
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    raw = b"".join(chunks)
+    return status_code, json.loads(raw) if raw else {}
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_drill_load(
+    app,
+    emergencies: int = 50,
+    clients_per_role: int = 25,
+    concurrency: int = 10,
+    send_delay: float = 0.0,
+    timeout: float = 30.0,
+    end_simulations: bool = True,
+    encoding: str = "json",
+    compression: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Fire simulated emergencies at fake clients and report delivery latency and throughput"""
+    run = DrillLoadRun()
+    clients: List[LoadClient] = []
+    for role in ROLES:
+        for i in range(clients_per_role):
+            client = LoadClient(f"load-{role}-{i}", role, run, send_delay, encoding, compression)
+            await manager.connect(client, client.user_id, role, encoding, compression)
+            clients.append(client)
+
+    token = create_access_token({"sub": "load-coach@loadgen", "id": LOAD_COACH_ID, "role": "coach"})
+    # Drill alerts go to every coach, referee and teammate; athlete clients only add fan-out work
+    recipients = clients_per_role * 3
+    slots = asyncio.Semaphore(concurrency)
+    simulation_ids: List[str] = []
+    errors: Dict[int, int] = {}
+
+    async def fire(n: int) -> None:
+        marker = f"Load Athlete {n}"
+        body = {"athlete_id": f"load-athlete-{n % max(clients_per_role, 1)}", "athlete_name": marker}
+        async with slots:
+            run.trigger(marker, recipients)
+            status_code, response = await asgi_request(app, "POST", START_PATH, body, token)
+        if status_code == 200:
+            simulation_ids.append(response["simulation_id"])
+        else:
+            errors[status_code] = errors.get(status_code, 0) + 1
+            run.cancel(marker)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(fire(n) for n in range(emergencies)))
+        completed = await run.wait(timeout)
+        elapsed = time.perf_counter() - started
+    finally:
+        for client in clients:
+            manager.disconnect(client, client.user_id, client.role)
+
+    if end_simulations:
+        for simulation_id in simulation_ids:
+            await asgi_request(app, "POST", END_PATH.format(simulation_id=simulation_id), {}, token)
+
+    latencies = sorted(run.latencies)
+    expected_total = sum(run.expected.values())
+    delivered_total = len(latencies)
+    return {
+        "emergencies": emergencies,
+        "clients_per_role": clients_per_role,
+        "concurrency": concurrency,
+        "send_delay_ms": round(send_delay * 1000, 3),
+        "encoding": encoding,
+        "compression": compression,
+        "started": len(simulation_ids),
+        "start_errors": errors,
+        "expected_deliveries": expected_total,
+        "delivered": delivered_total,
+        "dropped_frames": expected_total - delivered_total,
+        "duplicate_frames": run.duplicates,
+        "completed_within_timeout": completed,
+        "elapsed_seconds": round(elapsed, 4),
+        "alerts_per_second": round(len(simulation_ids) / elapsed, 2) if elapsed else None,
+        "deliveries_per_second": round(delivered_total / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": _ms(_percentile(latencies, 0.5)),
+            "p99": _ms(_percentile(latencies, 0.99)),
+            "max": _ms(latencies[-1] if latencies else None),
+        },
+        "supervisor": task_supervisor.stats(),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 3) if seconds is not None else None
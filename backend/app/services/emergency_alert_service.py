@@ -1,29 +1,77 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional, Set, Union
 from datetime import datetime
 import json
+import time
+import zlib
 import asyncio
+import msgpack
 from fastapi import WebSocket
 
+from app.services.response_cache import dashboard_cache
+from app.services.responder_tracker import responder_tracker
+from app.services.emergency_event_log import event_log
+from app.services.metrics import alert_fanout_duration, alert_fanout_recipients, websocket_connections
+
+# Frame encodings a client can ask for when it connects
+ENCODINGS = ("json", "msgpack")
+COMPRESSIONS = (None, "deflate")
+DEFLATE_LEVEL = 6
+
+# A JSON frame is sent as text; everything else is a binary frame
+Frame = Union[str, bytes]
+
+def encode_frame(message: Dict[str, Any], encoding: str = "json", compression: Optional[str] = None) -> Frame:
+    if encoding == "msgpack":
+        payload = msgpack.packb(message, default=str)
+    else:
+        payload = json.dumps(message, separators=(",", ":"), ensure_ascii=False, default=str)
+    if compression == "deflate":
+        if isinstance(payload, str):
+            payload = payload.encode()
+        # Raw deflate stream, no zlib header
+        payload = zlib.compress(payload, DEFLATE_LEVEL, wbits=-15)
+    return payload
+
+def decode_frame(data: Frame, encoding: str = "json", compression: Optional[str] = None) -> Dict[str, Any]:
+    """Decode a client frame; raises ValueError for malformed input"""
+    try:
+        if isinstance(data, bytes) and compression == "deflate":
+            data = zlib.decompress(data, wbits=-15)
+        if isinstance(data, bytes) and encoding == "msgpack":
+            return msgpack.unpackb(data)
+        return json.loads(data)
+    except (ValueError, zlib.error, msgpack.UnpackException) as exc:
+        raise ValueError(str(exc)) from exc
+
 # Store active WebSocket connections
 class ConnectionManager:
     def __init__(self):
         # Store connections by user_id and role
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Connection keys indexed by user_id and by role, so targeted sends skip everyone else
+        self.keys_by_user: Dict[str, Set[str]] = {}
+        self.keys_by_role: Dict[str, Set[str]] = {}
+        # Negotiated (encoding, compression) per connection
+        self.connection_formats: Dict[WebSocket, tuple] = {}
         # Track emergency alerts
         self.active_emergencies: Dict[str, Dict[str, Any]] = {}
     
-    async def connect(self, websocket: WebSocket, user_id: str, role: str):
+    async def connect(self, websocket: WebSocket, user_id: str, role: str, encoding: str = "json", compression: Optional[str] = None):
         await websocket.accept()
         # Create a connection key that includes both user_id and role
         connection_key = f"{user_id}:{role}"
         
         if connection_key not in self.active_connections:
             self.active_connections[connection_key] = []
+            self.keys_by_user.setdefault(str(user_id), set()).add(connection_key)
+            self.keys_by_role.setdefault(str(role), set()).add(connection_key)
         
         self.active_connections[connection_key].append(websocket)
+        self.connection_formats[websocket] = (encoding, compression)
     
     def disconnect(self, websocket: WebSocket, user_id: str, role: str):
         connection_key = f"{user_id}:{role}"
+        self.connection_formats.pop(websocket, None)
         
         if connection_key in self.active_connections:
             if websocket in self.active_connections[connection_key]:
@@ -32,26 +80,108 @@ class ConnectionManager:
             # Clean up empty lists
             if not self.active_connections[connection_key]:
                 del self.active_connections[connection_key]
+                self._unindex(self.keys_by_user, str(user_id), connection_key)
+                self._unindex(self.keys_by_role, str(role), connection_key)
+    
+    @staticmethod
+    def _unindex(index: Dict[str, Set[str]], value: str, connection_key: str) -> None:
+        keys = index.get(value)
+        if keys is not None:
+            keys.discard(connection_key)
+            if not keys:
+                del index[value]
+    
+    def connection_keys(self, roles: Iterable[str] = (), user_ids: Iterable[str] = ()) -> Set[str]:
+        """Keys of the connections held by any of the roles or users"""
+        keys: Set[str] = set()
+        for role in roles:
+            keys |= self.keys_by_role.get(role, set())
+        for user_id in user_ids:
+            keys |= self.keys_by_user.get(user_id, set())
+        return keys
+    
+    async def send(self, websocket: WebSocket, message: Dict[str, Any], frames: Optional[Dict[tuple, Frame]] = None):
+        """Send a message in the connection's negotiated format.
+        
+        frames caches the encoded message per format, so a broadcast that
+        passes the same dict for every recipient encodes each format once.
+        """
+        frame_format = self.connection_formats.get(websocket, ("json", None))
+        if frames is None:
+            frame = encode_frame(message, *frame_format)
+        else:
+            frame = frames.get(frame_format)
+            if frame is None:
+                frame = frames[frame_format] = encode_frame(message, *frame_format)
+        if isinstance(frame, str):
+            await websocket.send_text(frame)
+        else:
+            await websocket.send_bytes(frame)
+    
+    def decode(self, websocket: WebSocket, data: Frame) -> Dict[str, Any]:
+        return decode_frame(data, *self.connection_formats.get(websocket, ("json", None)))
     
-    async def send_personal_message(self, message: Dict[str, Any], user_id: str, role: str):
+    async def send_personal_message(self, message: Dict[str, Any], user_id: str, role: str, frames: Optional[Dict[tuple, Frame]] = None) -> int:
+        """Send to one user's connections; returns how many connections were sent to"""
         connection_key = f"{user_id}:{role}"
+        frames = {} if frames is None else frames
+        sent = 0
         
         if connection_key in self.active_connections:
             for connection in self.active_connections[connection_key]:
-                await connection.send_json(message)
+                await self.send(connection, message, frames)
+                sent += 1
+        return sent
     
-    async def broadcast_by_role(self, message: Dict[str, Any], role: str):
+    async def broadcast_by_role(self, message: Dict[str, Any], role: str, frames: Optional[Dict[tuple, Frame]] = None) -> int:
+        """Send to every connection with a role; returns how many connections were sent to"""
+        frames = {} if frames is None else frames
+        sent = 0
         # Send to all connections with the specified role
-        for connection_key, connections in self.active_connections.items():
-            if connection_key.endswith(f":{role}"):
-                for connection in connections:
-                    await connection.send_json(message)
+        for connection_key in list(self.keys_by_role.get(role, ())):
+            for connection in list(self.active_connections.get(connection_key, ())):
+                await self.send(connection, message, frames)
+                sent += 1
+        return sent
+    
+    def connection_total(self) -> int:
+        return sum(len(connections) for connections in self.active_connections.values())
+    
+    async def close_all(self, code: int = 1001):
+        """Close every connection, by default with 1001 (going away) so clients reconnect elsewhere"""
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                try:
+                    await connection.close(code=code)
+                except Exception:
+                    pass
+        self.active_connections.clear()
+        self.keys_by_user.clear()
+        self.keys_by_role.clear()
+        self.connection_formats.clear()
+    
+    def connection_count(self, role: str) -> int:
+        return sum(len(self.active_connections.get(key, ())) for key in self.keys_by_role.get(role, ()))
     
     async def broadcast_emergency_alert(self, emergency_data: Dict[str, Any]):
-        # Store the emergency
-        emergency_id = str(emergency_data.get("id", datetime.now().timestamp()))
+        """Record a genuine emergency (emergency_data["id"] is required) and alert everyone"""
+        emergency_id = str(emergency_data["id"])
         self.active_emergencies[emergency_id] = emergency_data
+        responder_tracker.register(emergency_id)
+        # Buffered for the next group commit; fan-out does not wait for the fsync
+        event_log.append("alert_triggered", emergency_id, emergency_data)
+        self._invalidate_dashboards()
+        await self._fan_out(emergency_data)
+    
+    async def broadcast_simulation_update(self, payload: Dict[str, Any]):
+        """Deliver a drill start or end message in the same envelope as an alert.
         
+        Drills are tracked by the simulation store, so nothing is added to
+        active_emergencies or the responder tracker here.
+        """
+        await self._fan_out(payload)
+    
+    async def _fan_out(self, emergency_data: Dict[str, Any]):
         # Prepare different messages based on role
         athlete_message = {
             "type": "emergency_alert",
@@ -67,14 +197,21 @@ class ConnectionManager:
             "data": emergency_data
         }
         
+        started = time.perf_counter()
+        recipients = 0
+        
         # Send to the affected athlete
         if "athlete_id" in emergency_data:
-            await self.send_personal_message(athlete_message, emergency_data["athlete_id"], "athlete")
+            recipients += await self.send_personal_message(athlete_message, emergency_data["athlete_id"], "athlete")
+        
+        # Send to all coaches, referees, and medical staff, encoding once per format
+        medical_frames: Dict[tuple, Frame] = {}
+        recipients += await self.broadcast_by_role(medical_message, "coach", medical_frames)
+        recipients += await self.broadcast_by_role(medical_message, "referee", medical_frames)
+        recipients += await self.broadcast_by_role(medical_message, "teammate", medical_frames)
         
-        # Send to all coaches, referees, and medical staff
-        await self.broadcast_by_role(medical_message, "coach")
-        await self.broadcast_by_role(medical_message, "referee")
-        await self.broadcast_by_role(medical_message, "teammate")
+        alert_fanout_duration.observe(time.perf_counter() - started)
+        alert_fanout_recipients.observe(recipients)
     
     def get_active_emergencies(self) -> Dict[str, Dict[str, Any]]:
         return self.active_emergencies
@@ -82,12 +219,25 @@ class ConnectionManager:
     def resolve_emergency(self, emergency_id: str) -> bool:
         if emergency_id in self.active_emergencies:
             del self.active_emergencies[emergency_id]
+            responder_tracker.remove(emergency_id)
+            event_log.append("emergency_resolved", emergency_id)
+            self._invalidate_dashboards()
             return True
         return False
+    
+    def _invalidate_dashboards(self):
+        # Role dashboards show emergency alerts, so cached copies go stale
+        dashboard_cache.invalidate("teammate")
+        dashboard_cache.invalidate("referee")
+        dashboard_cache.invalidate("coach")
 
 # Create a global instance of the connection manager
 manager = ConnectionManager()
 
+# Connection counts are computed when metrics are scraped, not on connect/disconnect
+for _role in ("athlete", "coach", "referee", "teammate"):
+    websocket_connections.labels(_role).set_function(lambda role=_role: manager.connection_count(role))
+
 # Simulate cardiac anomaly detection
 async def simulate_cardiac_anomaly(athlete_id: str, athlete_name: str, location: Dict[str, float]):
     # Create emergency data
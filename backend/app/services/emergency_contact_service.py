@@ -1,6 +1,10 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.models.emergency_contact import EmergencyContactCreate, EmergencyContact as EmergencyContactModel
-from typing import List
+from typing import Any, Dict, List
+
+# Columns returned by the contact endpoints, in EmergencyContactResponse order
+CONTACT_FIELDS = ("id", "name", "phone_number", "relationship", "user_id")
 
 def create_emergency_contact(db: Session, contact: EmergencyContactCreate, user_id: int) -> EmergencyContactModel:
     db_contact = EmergencyContactModel(**contact.model_dump(), user_id=user_id)
@@ -12,10 +16,25 @@ def create_emergency_contact(db: Session, contact: EmergencyContactCreate, user_
 def get_emergency_contacts_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[EmergencyContactModel]:
     return db.query(EmergencyContactModel).filter(EmergencyContactModel.user_id == user_id).offset(skip).limit(limit).all()
 
+def get_emergency_contact_rows(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    """Contacts as plain dicts, selecting only the response columns without building ORM objects"""
+    query = (
+        select(*(getattr(EmergencyContactModel, field) for field in CONTACT_FIELDS))
+        .where(EmergencyContactModel.user_id == user_id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [dict(row) for row in db.execute(query).mappings()]
+
+def contact_to_dict(db_contact: EmergencyContactModel) -> Dict[str, Any]:
+    return {field: getattr(db_contact, field) for field in CONTACT_FIELDS}
+
 def get_emergency_contact(db: Session, contact_id: int, user_id: int) -> EmergencyContactModel:
     return db.query(EmergencyContactModel).filter(EmergencyContactModel.id == contact_id, EmergencyContactModel.user_id == user_id).first()
 
 def update_emergency_contact(db: Session, contact_id: int, contact_update: EmergencyContactCreate, user_id: int) -> EmergencyContactModel:
+    # Look the contact up on the primary, so one created a moment ago is not reported missing
+    db.use_primary()
     db_contact = db.query(EmergencyContactModel).filter(EmergencyContactModel.id == contact_id, EmergencyContactModel.user_id == user_id).first()
     if db_contact:
         update_data = contact_update.model_dump(exclude_unset=True)
@@ -26,6 +45,7 @@ def update_emergency_contact(db: Session, contact_id: int, contact_update: Emerg
     return db_contact
 
 def delete_emergency_contact(db: Session, contact_id: int, user_id: int) -> EmergencyContactModel:
+    db.use_primary()
     db_contact = db.query(EmergencyContactModel).filter(EmergencyContactModel.id == contact_id, EmergencyContactModel.user_id == user_id).first()
     if db_contact:
         db.delete(db_contact)
@@ -0,0 +1,299 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+import orjson
+
+from app.services.metrics import background_queue_depth, event_log_batch_records, event_log_fsync_duration
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Append-only log of emergency events: alerts, responder updates, resolutions
+# and drill start/end/archive, one JSON object per line. append() only
+# serializes the event into a buffer; a writer thread writes whatever has
+# accumulated and fsyncs once per batch (group commit), so a burst of events
+# shares one fsync and alert fan-out never waits on the disk. On startup the
+# log is replayed to rebuild the in-memory emergency state.
+#
+# Every worker process appends to the same file, holding an exclusive flock
+# for each batch. Once the file outgrows EVENT_LOG_COMPACT_MB it is renamed to
+# <path>.<timestamp>, which keeps the full timeline, and replaced by a
+# checkpoint holding only the records still needed for recovery, so replay
+# at startup stays bounded.
+
+# Empty to disable the log
+EMERGENCY_EVENT_LOG = os.environ.get("EMERGENCY_EVENT_LOG", "./emergency_events.log")
+# How long the writer lets a burst accumulate before each fsync
+EVENT_LOG_FLUSH_SECONDS = float(os.environ.get("EVENT_LOG_FLUSH_MS", 5)) / 1000
+# Size at which the log is archived and replaced by a checkpoint
+EVENT_LOG_COMPACT_BYTES = int(float(os.environ.get("EVENT_LOG_COMPACT_MB", 8)) * 1024 * 1024)
+# Backoff before retrying a batch whose write failed
+EVENT_LOG_RETRY_SECONDS = 1.0
+
+
+def read_records(path: str) -> Tuple[List[Dict[str, Any]], int]:
+    """Every complete record in the file, and the byte offset where the complete records end"""
+    records: List[Dict[str, Any]] = []
+    good_offset = 0
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return records, 0
+    with f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                logger.warning("Skipping unreadable emergency event at byte %d of %s", good_offset, path)
+            good_offset += len(line)
+    return records, good_offset
+
+
+def live_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The records still needed to rebuild state, in log order.
+
+    That is unresolved alerts, unarchived drills, and the latest update of
+    each responder to either of them.
+    """
+    alerts: Dict[str, int] = {}
+    simulations: Dict[str, List[int]] = {}
+    responders: Dict[str, Dict[str, int]] = {}
+    for index, record in enumerate(records):
+        event = record.get("event")
+        emergency_id = record.get("emergency_id")
+        if event == "alert_triggered":
+            # Older logs recorded drill envelopes as alerts; drills are restored from their own events
+            if not (record["data"] or {}).get("is_simulation"):
+                alerts[emergency_id] = index
+        elif event == "emergency_resolved":
+            alerts.pop(emergency_id, None)
+            responders.pop(emergency_id, None)
+        elif event == "responder_updated":
+            responders.setdefault(emergency_id, {})[record["data"]["user_id"]] = index
+        elif event == "simulation_started":
+            simulations[emergency_id] = [index]
+        elif event == "simulation_ended":
+            if emergency_id in simulations:
+                simulations[emergency_id].append(index)
+            # The end record carries the final responder list
+            responders.pop(emergency_id, None)
+        elif event == "simulation_archived":
+            simulations.pop(emergency_id, None)
+            responders.pop(emergency_id, None)
+    keep = set(alerts.values())
+    for indexes in simulations.values():
+        keep.update(indexes)
+    for emergency_id, by_user in responders.items():
+        if emergency_id in alerts or emergency_id in simulations:
+            keep.update(by_user.values())
+    return [records[index] for index in sorted(keep)]
+
+
+class EmergencyEventLog:
+    """Buffered append-only event log with one fsync per batch.
+
+    Records are numbered per process (seq, with the writer's pid) and keep
+    their append order within a process. durable_seq is the last sequence
+    number known to be on disk. The writer thread starts on the first append.
+    """
+
+    def __init__(
+        self,
+        path: str = EMERGENCY_EVENT_LOG,
+        flush_interval: float = EVENT_LOG_FLUSH_SECONDS,
+        compact_bytes: int = EVENT_LOG_COMPACT_BYTES,
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self.enabled = bool(path)
+        self.seq = 0
+        self.durable_seq = 0
+        self.compactions = 0
+        self._pid = os.getpid()
+        self._pending: List[bytes] = []
+        self._lock = threading.Lock()
+        # Serializes file access between the writer thread and recover()
+        self._file_mutex = threading.Lock()
+        self._wake = threading.Event()
+        self._fd: Optional[int] = None
+        self._rotated = False
+        self._writer: Optional[threading.Thread] = None
+        self._closing = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def append(self, event: str, emergency_id: str, data: Optional[Dict[str, Any]] = None) -> int:
+        """Queue an event for the next group commit; returns its sequence number (0 when disabled)"""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="emergency-event-log", daemon=True)
+                self._writer.start()
+            self.seq += 1
+            record = {
+                "seq": self.seq, "pid": self._pid, "at": datetime.now().isoformat(),
+                "event": event, "emergency_id": emergency_id, "data": data,
+            }
+            # Serialized now, so later in-place changes to data do not leak into this record
+            self._pending.append(orjson.dumps(record, default=str) + b"\n")
+            seq = self.seq
+        # Setting the event takes a lock; within a burst the writer is already awake
+        if not self._wake.is_set():
+            self._wake.set()
+        return seq
+
+    @contextmanager
+    def _locked_file(self) -> Iterator[int]:
+        """Exclusive flock on the current log file, reopening it if another process rotated it"""
+        while True:
+            if self._fd is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                current = os.stat(self.path)
+            except FileNotFoundError:
+                current = None
+            if current is not None and os.path.samestat(os.fstat(self._fd), current):
+                break
+            self._close_fd()
+        try:
+            yield self._fd
+        finally:
+            if self._rotated:
+                # Our descriptor points at the archived file now
+                self._rotated = False
+                self._close_fd()
+            elif fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _close_fd(self) -> None:
+        # Closing the descriptor also releases its flock
+        os.close(self._fd)
+        self._fd = None
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            if not self._closing:
+                time.sleep(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                batch, self._pending = self._pending, []
+                last_seq = self.seq
+            if batch and not self._write(batch, last_seq):
+                with self._lock:
+                    self._pending[:0] = batch
+                if self._closing:
+                    return
+                time.sleep(EVENT_LOG_RETRY_SECONDS)
+                self._wake.set()
+                continue
+            if self._closing and not self._pending:
+                return
+
+    def _write(self, batch: List[bytes], last_seq: int) -> bool:
+        started = time.perf_counter()
+        with self._file_mutex:
+            try:
+                with self._locked_file() as fd:
+                    offset = os.lseek(fd, 0, os.SEEK_END)
+                    data = memoryview(b"".join(batch))
+                    try:
+                        while data:
+                            written = os.write(fd, data)
+                            data = data[written:]
+                        os.fsync(fd)
+                    except OSError:
+                        # Drop any partial write so the retry does not leave a torn line behind
+                        try:
+                            os.ftruncate(fd, offset)
+                        except OSError:
+                            pass
+                        raise
+                    self.durable_seq = last_seq
+                    event_log_fsync_duration.observe(time.perf_counter() - started)
+                    event_log_batch_records.observe(len(batch))
+                    if os.fstat(fd).st_size > self.compact_bytes:
+                        self._compact(read_records(self.path)[0])
+            except OSError:
+                logger.exception("Failed to write %d emergency events to %s", len(batch), self.path)
+                return self.durable_seq >= last_seq
+        return True
+
+    def _compact(self, records: List[Dict[str, Any]]) -> None:
+        """Archive the current file and replace it with a checkpoint; call with the file lock held"""
+        live = live_records(records)
+        archive = f"{self.path}.{datetime.now():%Y%m%dT%H%M%S%f}"
+        checkpoint = f"{self.path}.checkpoint"
+        with open(checkpoint, "wb") as f:
+            f.write(orjson.dumps({
+                "seq": 0, "pid": self._pid, "at": datetime.now().isoformat(), "event": "checkpoint",
+                "emergency_id": None, "data": {"previous": os.path.basename(archive), "records": len(live)},
+            }) + b"\n")
+            for record in live:
+                f.write(orjson.dumps(record) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        # Writers waiting on the old file's lock notice the rename and reopen the path
+        os.rename(self.path, archive)
+        os.replace(checkpoint, self.path)
+        if fcntl is not None:
+            directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        self._rotated = True
+        self.compactions += 1
+        logger.info("Archived emergency event log to %s; checkpoint keeps %d of %d records", archive, len(live), len(records))
+
+    def recover(self) -> List[Dict[str, Any]]:
+        """Records needed to rebuild state, cutting off a torn last line left by a crash.
+
+        Runs under the file lock, so no other process is mid-write while the
+        tail is checked. A log over the compaction size is checkpointed here.
+        """
+        if not self.enabled:
+            return []
+        with self._file_mutex, self._locked_file() as fd:
+            records, good_offset = read_records(self.path)
+            if good_offset < os.fstat(fd).st_size:
+                logger.warning("Truncating torn record at the end of %s", self.path)
+                os.ftruncate(fd, good_offset)
+            if good_offset > self.compact_bytes:
+                self._compact(records)
+        return live_records(records)
+
+    def close(self) -> None:
+        """Write out pending events and stop the writer"""
+        with self._lock:
+            self._closing = True
+            self.enabled = False
+            writer = self._writer
+        if writer is not None:
+            self._wake.set()
+            writer.join()
+        with self._file_mutex:
+            if self._fd is not None:
+                self._close_fd()
+
+# Create a global instance of the emergency event log
+event_log = EmergencyEventLog()
+background_queue_depth.labels("emergency_event_log").set_function(lambda: event_log.pending)
@@ -0,0 +1,68 @@
+import logging
+from typing import Dict, List, Any, Optional
+
+from app.services.analytics_service import response_analytics
+from app.services.emergency_alert_service import manager
+from app.services.emergency_event_log import EmergencyEventLog, event_log
+from app.services.responder_tracker import responder_tracker
+from app.services.simulation_store import simulation_store
+
+logger = logging.getLogger(__name__)
+
+
+def _in_response_order(responders: Optional[Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    # A checkpoint keeps only each responder's latest update, so file order is not response order
+    return sorted((responders or {}).values(), key=lambda responder: responder["first_response_at"])
+
+
+def recover_emergency_state(log: EmergencyEventLog = event_log) -> Dict[str, int]:
+    """Replay the emergency event log into the in-memory state after a restart.
+
+    Rebuilds active emergencies, their responders, and drills that are still
+    running or completed but not yet archived. Returns what was restored.
+    """
+    alerts: Dict[str, Dict[str, Any]] = {}
+    responders: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    simulations: Dict[str, Dict[str, Any]] = {}
+    # Only unresolved alerts, unarchived drills and their latest responder updates come back
+    records = log.recover()
+    for record in records:
+        event = record["event"]
+        emergency_id = record["emergency_id"]
+        data = record["data"]
+        if event == "alert_triggered":
+            alerts[emergency_id] = record
+        elif event == "responder_updated":
+            responders.setdefault(emergency_id, {})[data["user_id"]] = data
+        elif event == "simulation_started":
+            simulations[emergency_id] = data
+        elif event == "simulation_ended":
+            simulations[emergency_id].update(data)
+
+    for emergency_id, record in alerts.items():
+        manager.active_emergencies[emergency_id] = record["data"]
+        responder_tracker.restore(emergency_id, record["at"], responders=_in_response_order(responders.get(emergency_id)))
+    for simulation_id, simulation in simulations.items():
+        if simulation["status"] == "active":
+            # The simulation shares its responder list and response times with the tracker entry
+            entry = responder_tracker.restore(
+                simulation_id, simulation["start_time"], simulation.get("team"), True,
+                _in_response_order(responders.get(simulation_id)),
+            )
+            simulation["responders"] = entry.responders
+            simulation["response_times"] = entry.response_times
+            simulation_store.add(simulation)
+        else:
+            simulation_store.add(simulation)
+            simulation_store.complete(simulation_id)
+        # Drills still in the log are not archived yet, so the analytics backfill did not see them
+        response_analytics.record_simulation(simulation)
+
+    restored = {
+        "records": len(records),
+        "emergencies": len(alerts),
+        "simulations": len(simulations),
+    }
+    if records:
+        logger.info("Recovered emergency state from %s: %s", log.path, restored)
+    return restored
@@ -0,0 +1,253 @@
+import io
+import csv
+import json
+import zlib
+import base64
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from sqlalchemy import select, and_, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.incident_report import IncidentReport as IncidentReportModel
+from app.services.analytics_service import response_analytics
+
+Cursor = Tuple[datetime, str]
+
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_CSV_COLUMNS = (
+    "id", "emergency_id", "athlete_id", "athlete_name", "outcome_status", "incident_at",
+    "generated_at", "generated_by", "response_time_seconds", "cpr_initiated", "aed_used",
+    "emergency_services_called",
+)
+# Rows fetched from the DB cursor per round trip, and rows per chunk sent to the client
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_ROWS = 100
+
+
+def build_incident_report(emergency_id: str, generated_by: Optional[int], report_id: Optional[str] = None) -> Dict[str, Any]:
+    """Assemble the incident report document for an emergency"""
+    # In a real app, we would fetch the emergency details from the database
+    # For now, we'll generate mock data
+
+    # Generate a unique report ID unless the caller fixed one
+    report_id = report_id or str(uuid.uuid4())
+
+    # Create timestamp for the report
+    timestamp = datetime.now().isoformat()
+
+    # Mock data for the incident report
+    report = {
+        "id": report_id,
+        "emergency_id": emergency_id,
+        "generated_by": generated_by,
+        "generated_at": timestamp,
+        "athlete_data": {
+            "id": random.randint(1, 100),
+            "name": "John Doe",
+            "age": random.randint(18, 35),
+            "team": "Team Alpha"
+        },
+        "incident_details": {
+            "timestamp": (datetime.now() - timedelta(hours=random.randint(1, 24))).isoformat(),
+            "location": "Field 3, North Section",
+            "initial_heart_rate": random.randint(150, 200),
+            "detected_anomaly": "Ventricular Tachycardia",
+            "alert_triggered_at": (datetime.now() - timedelta(hours=random.randint(1, 24), minutes=random.randint(1, 10))).isoformat(),
+        },
+        "response_details": {
+            "first_responder": "Coach Sarah Smith",
+            "response_time_seconds": random.randint(30, 180),
+            "cpr_initiated": random.choice([True, False]),
+            "aed_used": random.choice([True, False]),
+            "emergency_services_called": random.choice([True, False]),
+            "emergency_services_arrival_time": random.randint(300, 900)
+        },
+        "outcome": {
+            "status": random.choice(["Recovered", "Hospitalized", "Critical"]),
+            "notes": "Athlete was stabilized on-site and transported to Memorial Hospital."
+        },
+        "follow_up_actions": [
+            "Schedule cardiac evaluation",
+            "Review emergency response protocol",
+            "Update athlete medical records"
+        ]
+    }
+    
+    return report
+
+
+def generate_incident_report(emergency_id: str, generated_by: Optional[int], report_id: str) -> str:
+    """Build and store a report; runs on the report job queue. Returns the report ID.
+
+    report_id is fixed when the job is queued, so a retry after the insert
+    committed finds the stored report instead of inserting a duplicate.
+    """
+    db = SessionLocal()
+    # The idempotency check must see the primary, not a replica that has not caught up with the insert
+    db.use_primary()
+    try:
+        if get_incident_report(db, report_id) is not None:
+            return report_id
+        return create_incident_report(db, build_incident_report(emergency_id, generated_by, report_id)).id
+    finally:
+        db.close()
+
+
+def create_incident_report(db: Session, report: Dict[str, Any]) -> IncidentReportModel:
+    db_report = IncidentReportModel(
+        id=report["id"],
+        emergency_id=report["emergency_id"],
+        athlete_id=report["athlete_data"].get("id"),
+        athlete_name=report["athlete_data"].get("name"),
+        outcome_status=report["outcome"].get("status"),
+        incident_at=datetime.fromisoformat(report["incident_details"]["timestamp"]),
+        generated_by=report.get("generated_by"),
+        generated_at=datetime.fromisoformat(report["generated_at"]),
+        report=report,
+    )
+    db.add(db_report)
+    db.commit()
+    db.refresh(db_report)
+    response_analytics.record_incident(report)
+    return db_report
+
+
+def get_incident_report(db: Session, report_id: str) -> Optional[IncidentReportModel]:
+    return db.get(IncidentReportModel, report_id)
+
+
+def summarize(db_report: IncidentReportModel) -> Dict[str, Any]:
+    return {
+        "id": db_report.id,
+        "emergency_id": db_report.emergency_id,
+        "athlete_name": db_report.athlete_name,
+        "incident_date": db_report.incident_at.isoformat(),
+        "status": db_report.outcome_status,
+    }
+
+
+def list_incident_reports(
+    db: Session,
+    status: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = 50,
+    cursor: Optional[Cursor] = None,
+) -> Tuple[List[IncidentReportModel], Optional[Cursor]]:
+    """Return one page of reports, most recent incident first, and the cursor for the next page"""
+    query = _filter_query(status, start, end)
+    if cursor is not None:
+        incident_at, report_id = cursor
+        query = query.where(or_(
+            IncidentReportModel.incident_at < incident_at,
+            and_(IncidentReportModel.incident_at == incident_at, IncidentReportModel.id < report_id),
+        ))
+    query = query.order_by(IncidentReportModel.incident_at.desc(), IncidentReportModel.id.desc()).limit(limit + 1)
+
+    rows = list(db.scalars(query))
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1].incident_at, rows[-1].id)
+    return rows, next_cursor
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    incident_at, report_id = cursor
+    raw = f"r|{incident_at.isoformat()}|{report_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Decode a listing cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, incident_at, report_id = raw.split("|", 2)
+        if prefix != "r":
+            raise ValueError
+        return datetime.fromisoformat(incident_at), report_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _filter_query(status: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    query = select(IncidentReportModel)
+    if status is not None:
+        query = query.where(IncidentReportModel.outcome_status == status)
+    if start is not None:
+        query = query.where(IncidentReportModel.incident_at >= start)
+    if end is not None:
+        query = query.where(IncidentReportModel.incident_at <= end)
+    return query
+
+
+def _csv_row(db_report: IncidentReportModel) -> List[Any]:
+    response = db_report.report.get("response_details", {})
+    return [
+        db_report.id, db_report.emergency_id, db_report.athlete_id, db_report.athlete_name,
+        db_report.outcome_status, db_report.incident_at.isoformat(), db_report.generated_at.isoformat(),
+        db_report.generated_by, response.get("response_time_seconds"), response.get("cpr_initiated"),
+        response.get("aed_used"), response.get("emergency_services_called"),
+    ]
+
+
+def _iter_export_chunks(
+    export_format: str, status: Optional[str], start: Optional[datetime], end: Optional[datetime]
+) -> Iterator[str]:
+    # The session is owned by the generator because it outlives the request handler
+    db = SessionLocal()
+    try:
+        query = _filter_query(status, start, end).order_by(IncidentReportModel.incident_at, IncidentReportModel.id)
+        rows = db.scalars(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if export_format == "csv" else None
+        if writer is not None:
+            writer.writerow(EXPORT_CSV_COLUMNS)
+        pending = 0
+        for db_report in rows:
+            if writer is not None:
+                writer.writerow(_csv_row(db_report))
+            else:
+                buffer.write(json.dumps(db_report.report, separators=(",", ":")))
+                buffer.write("\n")
+            pending += 1
+            if pending >= EXPORT_CHUNK_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+                # Loaded reports are not needed again; keep the identity map from growing
+                db.expunge_all()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+def export_incident_reports(
+    export_format: str = "ndjson",
+    status: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    compress: bool = False,
+) -> Iterator[bytes]:
+    """Yield incident reports as NDJSON or CSV bytes, optionally gzip-compressed.
+
+    Rows are streamed from a DB cursor in batches, so memory use stays
+    constant regardless of how many reports are exported.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    for chunk in _iter_export_chunks(export_format, status, start, end):
+        data = chunk.encode("utf-8")
+        if compressor is None:
+            yield data
+        else:
+            # Sync flush so each chunk reaches the client without waiting for the next
+            yield compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    if compressor is not None:
+        yield compressor.flush()
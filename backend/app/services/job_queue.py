@@ -0,0 +1,178 @@
+import asyncio
+import inspect
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional
+
+from app.services.metrics import background_queue_depth
+
+logger = logging.getLogger(__name__)
+
+# How long a finished job stays queryable by ID
+JOB_RESULT_TTL_SECONDS = float(os.environ.get("JOB_RESULT_TTL_SECONDS", 3600))
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Job:
+    def __init__(self, key: Optional[str], func: Callable, args: tuple):
+        self.id = str(uuid.uuid4())
+        self.key = key
+        self.func = func
+        self.args = args
+        self.status = JobStatus.QUEUED
+        self.attempts = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.finished_at: Optional[str] = None
+        # Monotonic finish time, for expiring the job from the registry
+        self.finished_monotonic: Optional[float] = None
+
+    @property
+    def pending(self) -> bool:
+        return self.status in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = datetime.now().isoformat()
+        self.finished_monotonic = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """In-process async job queue with a bounded worker pool.
+
+    Jobs submitted with the same key while an earlier one is queued or
+    running share that job instead of running again; once it has finished,
+    the same key queues a new job. Finished jobs stay queryable for
+    result_ttl seconds. Failed jobs are retried with exponential backoff.
+    Sync functions run in a worker thread so they never block the event loop.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 1000,
+        max_retries: int = 2,
+        retry_delay: float = 0.5,
+        max_jobs: int = 10000,
+        result_ttl: float = JOB_RESULT_TTL_SECONDS,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_jobs = max_jobs
+        self.result_ttl = result_ttl
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._job_by_key: Dict[str, Job] = {}
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker_tasks = [
+                asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+                for i in range(self.workers)
+            ]
+
+    def submit(self, func: Callable, *args, key: Optional[str] = None) -> Job:
+        """Queue func(*args); raises asyncio.QueueFull when the queue is at capacity"""
+        if key is not None:
+            existing = self._job_by_key.get(key)
+            if existing is not None and existing.pending:
+                return existing
+
+        self._ensure_started()
+        job = Job(key, func, args)
+        self._queue.put_nowait(job)
+        self._jobs[job.id] = job
+        if key is not None:
+            self._job_by_key[key] = job
+        self._evict()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._evict()
+        return self._jobs.get(job_id)
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _evict(self) -> None:
+        # Forget the oldest finished jobs once they expire or the registry is full
+        expired_before = time.monotonic() - self.result_ttl
+        while self._jobs:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.pending:
+                break
+            if len(self._jobs) <= self.max_jobs and oldest.finished_monotonic > expired_before:
+                break
+            self._jobs.popitem(last=False)
+            if oldest.key is not None and self._job_by_key.get(oldest.key) is oldest:
+                del self._job_by_key[oldest.key]
+
+    async def _run(self, job: Job) -> Any:
+        if inspect.iscoroutinefunction(job.func):
+            return await job.func(*job.args)
+        return await asyncio.to_thread(job.func, *job.args)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                job.status = JobStatus.RUNNING
+                while True:
+                    job.attempts += 1
+                    try:
+                        job.result = await self._run(job)
+                        job.error = None
+                        job.finish(JobStatus.DONE)
+                        break
+                    except Exception as exc:
+                        job.error = str(exc)
+                        if job.attempts > self.max_retries:
+                            logger.exception("Job %s failed after %d attempts", job.id, job.attempts)
+                            job.finish(JobStatus.FAILED)
+                            break
+                        await asyncio.sleep(self.retry_delay * 2 ** (job.attempts - 1))
+            finally:
+                self._queue.task_done()
+
+    async def stop(self) -> None:
+        """Cancel the workers; jobs that have not finished are marked failed"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+        # A finished job is not reused for its key, so a later submit queues a fresh one
+        for job in self._jobs.values():
+            if job.pending:
+                job.error = "Stopped before the job finished"
+                job.finish(JobStatus.FAILED)
+
+# Create a global job queue for incident report generation
+report_jobs = JobQueue()
+background_queue_depth.labels("report_jobs").set_function(report_jobs.depth)
@@ -0,0 +1,293 @@
+import time
+from bisect import bisect_left
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+
+# Prometheus text-format metrics with no external dependency. Every labelled
+# child is created once and cached by its label values, and histogram buckets
+# are a pre-allocated list, so recording is a dict lookup, a bisect and a few
+# additions. Updates rely on the GIL rather than locks; a rare lost increment
+# is an acceptable price for staying on in production.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0
+        self.function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from function at scrape time instead of counting"""
+        self.function = function
+
+    def render(self, name: str, labelnames, values) -> Iterable[str]:
+        value = self.function() if self.function is not None else self.value
+        yield f"{name}{_format_labels(labelnames, values)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._children[()].inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._children[()].set_function(function)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; cumulated only when rendering
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def render(self, name: str, labelnames, values) -> Iterable[str]:
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            cumulative += count
+            le = 'le="' + _format_value(float(bound)) + '"'
+            yield f"{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}"
+        yield f"{name}_sum{_format_labels(labelnames, values)} {_format_value(self.sum)}"
+        yield f"{name}_count{_format_labels(labelnames, values)} {self.count}"
+
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def time(self) -> _Timer:
+        return self._children[()].time()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Create the global metrics registry and the application metrics
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "stomp_http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+http_requests = registry.counter(
+    "stomp_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+auth_decode_duration = registry.histogram(
+    "stomp_auth_token_decode_seconds", "Time to decode and verify a JWT", buckets=FAST_BUCKETS)
+db_checkout_duration = registry.histogram(
+    "stomp_db_connection_checkout_seconds", "Time to check a connection out of the pool", ("database",), FAST_BUCKETS)
+db_query_duration = registry.histogram(
+    "stomp_db_query_seconds", "SQL statement execution time", ("database",))
+websocket_connections = registry.gauge(
+    "stomp_websocket_connections", "Open WebSocket connections by role", ("role",))
+alert_fanout_duration = registry.histogram(
+    "stomp_alert_fanout_seconds", "Time to deliver one emergency alert to every recipient")
+alert_fanout_recipients = registry.histogram(
+    "stomp_alert_fanout_recipients", "WebSocket connections an emergency alert was sent to", buckets=COUNT_BUCKETS)
+background_queue_depth = registry.gauge(
+    "stomp_background_queue_depth", "Queued or in-flight background work", ("queue",))
+login_shed = registry.counter(
+    "stomp_login_shed_total", "Login attempts rejected before password verification", ("reason",))
+event_log_fsync_duration = registry.histogram(
+    "stomp_event_log_fsync_seconds", "Time to write and fsync one batch of emergency events")
+event_log_batch_records = registry.histogram(
+    "stomp_event_log_batch_records", "Emergency events made durable by one fsync", buckets=COUNT_BUCKETS)
+
+
+class MetricsMiddleware:
+    """Raw ASGI middleware recording latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            # The router stores the matched route in the scope; label by its template, not the raw path
+            route = scope.get("route")
+            template = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            http_request_duration.labels(method, template).observe(elapsed)
+            http_requests.labels(method, template, str(status_code)).inc()
+
+
+def _instrument_pool(pool, checkout: Histogram) -> None:
+    # SQLAlchemy has no event before a checkout, so the wait is timed around pool.connect.
+    # engine.dispose() (e.g. after a fork) swaps in pool.recreate(), which is instrumented in turn.
+    pool_connect = pool.connect
+    pool_recreate = pool.recreate
+
+    def connect():
+        started = time.perf_counter()
+        try:
+            return pool_connect()
+        finally:
+            checkout.observe(time.perf_counter() - started)
+
+    def recreate():
+        new_pool = pool_recreate()
+        _instrument_pool(new_pool, checkout)
+        return new_pool
+
+    pool.connect = connect
+    pool.recreate = recreate
+
+
+def instrument_engine(engine, database: str) -> None:
+    """Time pool checkouts and statement execution for an engine"""
+    checkout = db_checkout_duration.labels(database)
+    query = db_query_duration.labels(database)
+    _instrument_pool(engine.pool, checkout)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is not None:
+            query.observe(time.perf_counter() - started)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
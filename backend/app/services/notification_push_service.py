@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from sqlalchemy import select, or_
+
+from app.database import SessionLocal
+from app.models.notification import NotificationPreference
+from app.services.emergency_alert_service import manager
+from app.services.notification_service import PREFERENCE_FIELDS
+from app.services.metrics import background_queue_depth
+
+logger = logging.getLogger(__name__)
+
+# Which preference switch controls each notification type
+PREFERENCE_BY_TYPE = {
+    "reminder": "monthly_reminders",
+    "update": "protocol_updates",
+    "alert": "training_alerts",
+    "drill": "emergency_drills",
+}
+
+# Notifications created within this window are sent to a user as one frame
+BATCH_WINDOW_SECONDS = 0.05
+# Opt-outs are re-read after this long, so a change saved through another worker applies here too
+PUSH_PREFERENCES_TTL_SECONDS = float(os.environ.get("PUSH_PREFERENCES_TTL_SECONDS", 10))
+
+
+class NotificationPusher:
+    """Pushes new notifications to connected users over the alert WebSocket"""
+
+    def __init__(self, batch_window: float = BATCH_WINDOW_SECONDS, preferences_ttl: float = PUSH_PREFERENCES_TTL_SECONDS):
+        self.batch_window = batch_window
+        self.preferences_ttl = preferences_ttl
+        # user_id -> preference fields the user switched off; absent means all on
+        self._disabled: Optional[Dict[str, Set[str]]] = None
+        self._disabled_loaded_at = 0.0
+        self._pending: List[Tuple[Dict[str, Any], Set[str], Set[str]]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _load_preferences(self) -> Dict[str, Set[str]]:
+        db = SessionLocal()
+        try:
+            disabled = {}
+            # Only users who switched something off
+            query = select(NotificationPreference).where(or_(
+                *(getattr(NotificationPreference, field).is_(False) for field in PREFERENCE_FIELDS)
+            ))
+            for row in db.scalars(query):
+                off = {field for field in PREFERENCE_FIELDS if not getattr(row, field)}
+                if off:
+                    disabled[str(row.user_id)] = off
+            return disabled
+        finally:
+            db.close()
+
+    def set_preferences(self, user_id: Any, preferences: Dict[str, bool]) -> None:
+        """Apply a preference update made through this worker without waiting for the next reload"""
+        if self._disabled is None:
+            # Not loaded yet; the first flush reads the current rows
+            return
+        off = {field for field in PREFERENCE_FIELDS if not preferences.get(field, True)}
+        if off:
+            self._disabled[str(user_id)] = off
+        else:
+            self._disabled.pop(str(user_id), None)
+
+    def _wants(self, user_id: str, notification_type: str) -> bool:
+        field = PREFERENCE_BY_TYPE.get(notification_type)
+        return field is None or field not in self._disabled.get(user_id, ())
+
+    async def push(
+        self,
+        notification: Dict[str, Any],
+        target_roles: Optional[List[str]] = None,
+        target_user_ids: Optional[List[Any]] = None,
+    ) -> None:
+        """Queue a notification; queued notifications are flushed after the batch window"""
+        self._pending.append((
+            notification,
+            {str(role) for role in target_roles or []},
+            {str(user_id) for user_id in target_user_ids or []},
+        ))
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._flush_handle = None
+        # Keep a reference so the task is not garbage-collected mid-flight
+        self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        if self._disabled is None or time.monotonic() - self._disabled_loaded_at >= self.preferences_ttl:
+            self._disabled = await asyncio.to_thread(self._load_preferences)
+            self._disabled_loaded_at = time.monotonic()
+
+        # Only visit the connections some notification in the batch targets
+        if any(not roles and not user_ids for _, roles, user_ids in pending):
+            connection_keys = set(manager.active_connections)
+        else:
+            connection_keys = manager.connection_keys(
+                set().union(*(roles for _, roles, _ in pending)),
+                set().union(*(user_ids for _, _, user_ids in pending)),
+            )
+
+        for connection_key in connection_keys:
+            connections = manager.active_connections.get(connection_key)
+            if not connections:
+                continue
+            user_id, _, role = connection_key.partition(":")
+            batch = [
+                notification
+                for notification, roles, user_ids in pending
+                if ((not roles and not user_ids) or role in roles or user_id in user_ids)
+                and self._wants(user_id, notification["type"])
+            ]
+            if not batch:
+                continue
+            frame = {"type": "notifications", "notifications": batch}
+            encoded = {}
+            for connection in list(connections):
+                try:
+                    await manager.send(connection, frame, encoded)
+                except Exception:
+                    logger.exception("Failed to push notifications to %s", connection_key)
+
+# Create a global instance of the notification pusher
+notification_pusher = NotificationPusher()
+background_queue_depth.labels("notification_push").set_function(lambda: len(notification_pusher._pending))
@@ -0,0 +1,273 @@
+import base64
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, insert, union, and_, or_, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.notification import (
+    Notification as NotificationModel,
+    NotificationRoleTarget,
+    NotificationDelivery,
+    NotificationRead,
+    NotificationReadState,
+    NotificationCounter,
+    NotificationPreference,
+)
+
+# Notifications are indexed three ways: broadcasts, role targets and per-user
+# delivery rows. A user's feed is the union of the newest entries of those
+# three indexes, so its cost depends on that user's notifications only.
+#
+# Read state is a per-user watermark ("everything up to seq N is read") plus
+# a sparse set of notifications read individually above it. Audience sizes
+# are counted on create, which keeps unread counts to a few primary-key reads.
+
+PREFERENCE_FIELDS = ("monthly_reminders", "protocol_updates", "training_alerts", "emergency_drills")
+
+Cursor = Tuple[datetime, int]
+
+
+def _increment_counters(db: Session, keys: List[str]) -> None:
+    if not keys:
+        return
+    # One upsert, so concurrent creates never race to insert the same counter row
+    rows = [{"key": key, "count": 1} for key in keys]
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        statement = mysql_insert(NotificationCounter).values(rows)
+        statement = statement.on_duplicate_key_update(count=NotificationCounter.count + 1)
+    else:
+        statement = (postgresql_insert if dialect == "postgresql" else sqlite_insert)(NotificationCounter).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[NotificationCounter.key],
+            set_={"count": NotificationCounter.count + 1},
+        )
+    db.execute(statement)
+
+
+def create_notification(
+    db: Session,
+    title: str,
+    message: str,
+    type: str,
+    created_by: Optional[int],
+    target_roles: Optional[List[str]] = None,
+    target_user_ids: Optional[List[int]] = None,
+) -> NotificationModel:
+    target_roles = sorted(set(target_roles or []))
+    target_user_ids = sorted(set(target_user_ids or []))
+    now = datetime.now()
+
+    db_notification = NotificationModel(
+        id=str(uuid.uuid4()),
+        title=title,
+        message=message,
+        type=type,
+        created_by=created_by,
+        created_at=now,
+        is_broadcast=not target_roles and not target_user_ids,
+    )
+    db.add(db_notification)
+    db.flush()
+
+    # Fan out with one bulk insert per target table instead of row by row
+    if target_roles:
+        db.execute(insert(NotificationRoleTarget), [
+            {"notification_seq": db_notification.seq, "role": role, "created_at": now}
+            for role in target_roles
+        ])
+    if target_user_ids:
+        db.execute(insert(NotificationDelivery), [
+            {"notification_seq": db_notification.seq, "user_id": user_id, "created_at": now}
+            for user_id in target_user_ids
+        ])
+
+    counter_keys = ["all"] if db_notification.is_broadcast else []
+    counter_keys += [f"role:{role}" for role in target_roles]
+    counter_keys += [f"user:{user_id}" for user_id in target_user_ids]
+    # Users targeted directly and through their role would otherwise be counted twice
+    counter_keys += [f"overlap:{user_id}:{role}" for user_id in target_user_ids for role in target_roles]
+    _increment_counters(db, counter_keys)
+
+    db.commit()
+    db.refresh(db_notification)
+    return db_notification
+
+
+def _before(created_at_column, seq_column, cursor: Optional[Cursor]):
+    if cursor is None:
+        return True
+    created_at, seq = cursor
+    return or_(created_at_column < created_at, and_(created_at_column == created_at, seq_column < seq))
+
+
+def get_feed(
+    db: Session, user_id: int, role: str, limit: int, cursor: Optional[Cursor] = None
+) -> Tuple[List[NotificationModel], Optional[Cursor]]:
+    """Return one page of the user's feed, newest first, and the cursor for the next page"""
+    # Each branch walks its own (audience, created_at) index and stops after limit + 1 rows
+    broadcast = (
+        select(NotificationModel.seq.label("seq"))
+        .where(NotificationModel.is_broadcast.is_(True),
+               _before(NotificationModel.created_at, NotificationModel.seq, cursor))
+        .order_by(NotificationModel.created_at.desc(), NotificationModel.seq.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+    by_role = (
+        select(NotificationRoleTarget.notification_seq.label("seq"))
+        .where(NotificationRoleTarget.role == role,
+               _before(NotificationRoleTarget.created_at, NotificationRoleTarget.notification_seq, cursor))
+        .order_by(NotificationRoleTarget.created_at.desc(), NotificationRoleTarget.notification_seq.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+    by_user = (
+        select(NotificationDelivery.notification_seq.label("seq"))
+        .where(NotificationDelivery.user_id == user_id,
+               _before(NotificationDelivery.created_at, NotificationDelivery.notification_seq, cursor))
+        .order_by(NotificationDelivery.created_at.desc(), NotificationDelivery.notification_seq.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+    # union (not union all) drops notifications reached through two indexes
+    candidates = union(select(broadcast.c.seq), select(by_role.c.seq), select(by_user.c.seq)).subquery()
+    rows = list(db.scalars(
+        select(NotificationModel)
+        .where(NotificationModel.seq.in_(select(candidates.c.seq)))
+        .order_by(NotificationModel.created_at.desc(), NotificationModel.seq.desc())
+        .limit(limit + 1)
+    ))
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1].created_at, rows[-1].seq)
+    return rows, next_cursor
+
+
+def is_visible(db: Session, notification: NotificationModel, user_id: int, role: str) -> bool:
+    if notification.is_broadcast:
+        return True
+    role_target = db.scalar(
+        select(NotificationRoleTarget.id)
+        .where(NotificationRoleTarget.notification_seq == notification.seq, NotificationRoleTarget.role == role)
+        .limit(1)
+    )
+    if role_target is not None:
+        return True
+    delivery = db.scalar(
+        select(NotificationDelivery.id)
+        .where(NotificationDelivery.notification_seq == notification.seq, NotificationDelivery.user_id == user_id)
+        .limit(1)
+    )
+    return delivery is not None
+
+
+def get_read_seqs(db: Session, user_id: int, notifications: List[NotificationModel]) -> Set[int]:
+    """Sequence numbers among the given notifications that the user has read"""
+    state = db.get(NotificationReadState, user_id)
+    read_upto = state.read_upto_seq if state else 0
+    read = {n.seq for n in notifications if n.seq <= read_upto}
+    above = [n.seq for n in notifications if n.seq > read_upto]
+    if above:
+        read.update(db.scalars(
+            select(NotificationRead.notification_seq).where(
+                NotificationRead.user_id == user_id,
+                NotificationRead.notification_seq.in_(above),
+            )
+        ))
+    return read
+
+
+def mark_read(db: Session, notification_id: str, user_id: int, role: str) -> bool:
+    """Mark one notification as read; returns False if the user cannot see it"""
+    # Read-modify-write: a lagging replica could hide the notification or an existing read row
+    db.use_primary()
+    notification = db.scalar(select(NotificationModel).where(NotificationModel.id == notification_id))
+    if notification is None or not is_visible(db, notification, user_id, role):
+        return False
+    state = db.get(NotificationReadState, user_id)
+    if state is not None and notification.seq <= state.read_upto_seq:
+        return True
+    if db.get(NotificationRead, (user_id, notification.seq)) is None:
+        db.add(NotificationRead(user_id=user_id, notification_seq=notification.seq))
+        db.commit()
+    return True
+
+
+def _visible_count(db: Session, user_id: int, role: str) -> int:
+    keys = ("all", f"role:{role}", f"user:{user_id}", f"overlap:{user_id}:{role}")
+    counts = dict(db.execute(
+        select(NotificationCounter.key, NotificationCounter.count).where(NotificationCounter.key.in_(keys))
+    ).all())
+    all_count, role_count, user_count, overlap_count = (counts.get(key, 0) for key in keys)
+    return all_count + role_count + user_count - overlap_count
+
+
+def mark_all_read(db: Session, user_id: int, role: str) -> None:
+    """Move the user's watermark to the newest notification"""
+    # A lagging replica's newest seq would move the watermark backwards
+    db.use_primary()
+    latest_seq = db.scalar(select(func.max(NotificationModel.seq))) or 0
+    state = db.get(NotificationReadState, user_id)
+    if state is None:
+        state = NotificationReadState(user_id=user_id)
+        db.add(state)
+    state.read_upto_seq = latest_seq
+    state.read_upto_count = _visible_count(db, user_id, role)
+    db.query(NotificationRead).filter(NotificationRead.user_id == user_id).delete(synchronize_session=False)
+    db.commit()
+
+
+def unread_count(db: Session, user_id: int, role: str) -> int:
+    state = db.get(NotificationReadState, user_id)
+    read_upto_count = state.read_upto_count if state else 0
+    exceptions = db.scalar(
+        select(func.count()).select_from(NotificationRead).where(NotificationRead.user_id == user_id)
+    )
+    return max(0, _visible_count(db, user_id, role) - read_upto_count - exceptions)
+
+
+def get_preferences(db: Session, user_id: int) -> Dict[str, bool]:
+    db_preferences = db.get(NotificationPreference, user_id)
+    if db_preferences is None:
+        return {field: True for field in PREFERENCE_FIELDS}
+    return {field: getattr(db_preferences, field) for field in PREFERENCE_FIELDS}
+
+
+def update_preferences(db: Session, user_id: int, preferences: Dict[str, bool]) -> Dict[str, bool]:
+    db.use_primary()
+    db_preferences = db.get(NotificationPreference, user_id)
+    if db_preferences is None:
+        db_preferences = NotificationPreference(user_id=user_id)
+        db.add(db_preferences)
+    for field in PREFERENCE_FIELDS:
+        if field in preferences:
+            setattr(db_preferences, field, preferences[field])
+    db.commit()
+    return get_preferences(db, user_id)
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    created_at, seq = cursor
+    raw = f"n:{created_at.isoformat()}:{seq}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Decode a feed cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, rest = raw.split(":", 1)
+        created_at, seq = rest.rsplit(":", 1)
+        if prefix != "n" or not seq.isdigit():
+            raise ValueError
+        return datetime.fromisoformat(created_at), int(seq)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,190 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, Tuple
+
+from app.services.metrics import background_queue_depth, login_shed
+from app.services.request_profiler import ProfiledThreadPoolExecutor
+
+# Admission control for login. Every attempt takes a token from a per-account
+# and a per-client-IP bucket before any password hashing happens, and the
+# bcrypt work itself runs on a small dedicated executor so a login burst can
+# only occupy a fixed number of cores.
+
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
+# Per account: a short burst of attempts, then one every 12 seconds
+LOGIN_ACCOUNT_BURST = float(os.environ.get("LOGIN_ACCOUNT_BURST", 5))
+LOGIN_ACCOUNT_PER_SECOND = float(os.environ.get("LOGIN_ACCOUNT_PER_SECOND", 1 / 12))
+# Per client IP: generous enough for a whole team behind one venue NAT
+LOGIN_IP_BURST = float(os.environ.get("LOGIN_IP_BURST", 60))
+LOGIN_IP_PER_SECOND = float(os.environ.get("LOGIN_IP_PER_SECOND", 5))
+# Proxies in front of the app (load balancer, Vercel) that append to X-Forwarded-For.
+# 0 keys the IP bucket on the TCP peer; behind proxies that would put every client in one bucket
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", 0))
+
+LOGIN_HASH_WORKERS = int(os.environ.get("LOGIN_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+LOGIN_HASH_MAX_PENDING = int(os.environ.get("LOGIN_HASH_MAX_PENDING", LOGIN_HASH_WORKERS * 8))
+
+
+def client_ip(peer: Optional[str], forwarded_for: Optional[str], trusted_hops: int = TRUSTED_PROXY_HOPS) -> Optional[str]:
+    """The client address as seen by the outermost trusted proxy.
+
+    Each trusted proxy appends the address it received the request from, so
+    the entry trusted_hops from the right is the client; anything further
+    left was sent by the client and cannot be trusted.
+    """
+    if trusted_hops <= 0 or not forwarded_for:
+        return peer
+    addresses = [address.strip() for address in forwarded_for.split(",") if address.strip()]
+    if not addresses:
+        return peer
+    return addresses[-min(trusted_hops, len(addresses))]
+
+
+class MemoryBucketBackend:
+    """Token buckets in process memory, least recently used keys evicted past max_keys"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, capacity: float, per_second: float, cost: float = 1.0) -> float:
+        """Take cost tokens; returns 0 when allowed, otherwise seconds until enough tokens refill"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * per_second)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / per_second
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class RedisBucketBackend:
+    """Token buckets shared by every worker and host through Redis"""
+
+    # Refill and take atomically on the server
+    SCRIPT = """
+local tokens = tonumber(redis.call('HGET', KEYS[1], 't'))
+local updated = tonumber(redis.call('HGET', KEYS[1], 'u'))
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+if tokens == nil then
+    tokens = capacity
+    updated = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * per_second)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / per_second
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'u', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / per_second) + 1)
+return tostring(wait)
+"""
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL, prefix: str = "ratelimit:"):
+        # Imported lazily so the in-memory backend has no extra dependency
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, capacity: float, per_second: float, cost: float = 1.0) -> float:
+        wait = await self._script(keys=[self.prefix + key], args=[capacity, per_second, time.time(), cost])
+        return float(wait)
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND):
+    if name == "memory":
+        return MemoryBucketBackend()
+    if name == "redis":
+        return RedisBucketBackend()
+    raise ValueError(f"Unknown rate limit backend: {name}")
+
+
+class LoginRateLimiter:
+    """Per-account and per-IP token buckets in front of password verification"""
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self.shed: Dict[str, int] = {"ip": 0, "account": 0, "busy": 0}
+        self.admitted = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = create_backend()
+        return self._backend
+
+    async def admit(self, account: str, client_ip: Optional[str]) -> float:
+        """Returns 0 if the attempt may proceed, otherwise the Retry-After in seconds"""
+        if client_ip:
+            wait = await self.backend.take(f"login:ip:{client_ip}", LOGIN_IP_BURST, LOGIN_IP_PER_SECOND)
+            if wait:
+                self.shed["ip"] += 1
+                return wait
+        wait = await self.backend.take(f"login:account:{account.lower()}", LOGIN_ACCOUNT_BURST, LOGIN_ACCOUNT_PER_SECOND)
+        if wait:
+            self.shed["account"] += 1
+            return wait
+        self.admitted += 1
+        return 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"admitted": self.admitted, "shed": dict(self.shed), "hashing": password_executor.stats()}
+
+
+class PasswordHashExecutor:
+    """Runs bcrypt on a fixed pool and refuses work once too much is queued"""
+
+    def __init__(self, workers: int = LOGIN_HASH_WORKERS, max_pending: int = LOGIN_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def has_capacity(self) -> bool:
+        return self.pending < self.max_pending
+
+    async def run(self, func: Callable, *args) -> Any:
+        """Run func(*args) on the pool; raises asyncio.QueueFull when max_pending calls are already in flight"""
+        if self._executor is None:
+            self._executor = ProfiledThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        # Check and reserve with no await in between, so concurrent callers cannot overshoot the limit
+        if not self.has_capacity():
+            raise asyncio.QueueFull
+        self.pending += 1
+        try:
+            # Run in a copy of the caller's context, like asyncio.to_thread, so request-scoped state follows the call
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(self._executor, context.run, func, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "pending": self.pending, "max_pending": self.max_pending}
+
+# Create global instances of the login limiter and the password hashing pool
+password_executor = PasswordHashExecutor()
+login_limiter = LoginRateLimiter()
+background_queue_depth.labels("password_hashing").set_function(lambda: password_executor.pending)
+for _reason in login_limiter.shed:
+    login_shed.labels(_reason).set_function(lambda reason=_reason: login_limiter.shed[reason])
@@ -0,0 +1,222 @@
+import asyncio
+import contextvars
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+
+import anyio.to_thread
+
+logger = logging.getLogger(__name__)
+
+# Opt-in sampling profiler. A request is profiled when it carries
+# X-Debug-Profile: <PROFILE_DEBUG_TOKEN>, or at random with PROFILE_SAMPLE_RATE.
+# Profiles are written as collapsed stacks (flamegraph.pl / speedscope input)
+# and listed in index.jsonl with their route and latency.
+
+PROFILE_DEBUG_TOKEN = os.environ.get("PROFILE_DEBUG_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_SECONDS = float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000
+# Concurrent profiles are capped so sampling cannot pile up under load
+PROFILE_MAX_ACTIVE = int(os.environ.get("PROFILE_MAX_ACTIVE", 2))
+PROFILE_HEADER = b"x-debug-profile"
+# The sampler of the request being profiled, set by the middleware in the request's context
+_profiled_request: contextvars.ContextVar[Optional["StackSampler"]] = contextvars.ContextVar("profiled_request", default=None)
+# Worker thread ident -> sampler of the profiled request whose call the thread is running
+_sampler_by_thread: Dict[int, "StackSampler"] = {}
+
+
+def bind_profiled_request(func: Callable) -> Callable:
+    """Wrap func so the thread that runs it is registered with the caller's profiled request.
+
+    Call this on the calling side, before handing func to a thread. Returns
+    func unchanged when the caller's request is not being profiled.
+    """
+    sampler = _profiled_request.get()
+    if sampler is None:
+        return func
+
+    def call(*args, **kwargs):
+        thread_id = threading.get_ident()
+        _sampler_by_thread[thread_id] = sampler
+        try:
+            return func(*args, **kwargs)
+        finally:
+            del _sampler_by_thread[thread_id]
+
+    return call
+
+
+class ProfiledThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose calls are attributed to the profiled request that submitted them"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(bind_profiled_request(fn), *args, **kwargs)
+
+
+_anyio_run_sync = anyio.to_thread.run_sync
+
+
+async def _profiled_run_sync(func: Callable, *args, **kwargs) -> Any:
+    return await _anyio_run_sync(bind_profiled_request(func), *args, **kwargs)
+
+
+def install_thread_hooks() -> None:
+    """Attribute threadpool calls to the profiled request that made them.
+
+    FastAPI runs sync endpoints and dependencies through anyio's threadpool,
+    which is looked up as anyio.to_thread.run_sync on every call, so that is
+    wrapped. asyncio.to_thread uses the loop's default executor, which the
+    middleware replaces at lifespan startup.
+    """
+    anyio.to_thread.run_sync = _profiled_run_sync
+
+
+class StackSampler(threading.Thread):
+    """Samples the stacks working on one request at a fixed interval into collapsed-stack counts.
+
+    That is the event loop thread while the request's task is the one
+    running, and worker threads while they run a call made from that task.
+    Other requests and idle pool threads are left out.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float = PROFILE_INTERVAL_SECONDS):
+        super().__init__(name="request-profiler", daemon=True)
+        self.task = task
+        self.loop = task.get_loop()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._loop_thread_id = threading.get_ident()
+        self._stop_event = threading.Event()
+
+    def _working_for_request(self, thread_id: int) -> bool:
+        if thread_id == self._loop_thread_id:
+            return asyncio.current_task(self.loop) is self.task
+        return _sampler_by_thread.get(thread_id) is self
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or not self._working_for_request(thread_id):
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(frame)
+                    frame = frame.f_back
+                calls = [names.get(thread_id, str(thread_id))]
+                for frame in reversed(frames):
+                    code = frame.f_code
+                    calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                self.stacks[";".join(calls)] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _write_profile(directory: str, entry: Dict[str, Any], stacks: Counter) -> None:
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, entry["file"]), "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    with open(os.path.join(directory, "index.jsonl"), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+class ProfilerMiddleware:
+    """Raw ASGI middleware that profiles selected requests.
+
+    When neither a debug token nor a sample rate is configured the middleware
+    is a single attribute check, and unselected requests are passed straight
+    through without wrapping send or starting a sampler.
+    """
+
+    def __init__(
+        self,
+        app,
+        token: str = PROFILE_DEBUG_TOKEN,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        directory: str = PROFILE_DIR,
+    ):
+        self.app = app
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.enabled = bool(token) or sample_rate > 0
+        self.active = 0
+        if self.enabled:
+            install_thread_hooks()
+
+    def _trigger(self, scope) -> Optional[str]:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return "header" if hmac.compare_digest(value, self.token) else None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            if self.enabled and scope["type"] == "lifespan":
+                # Before startup, so no asyncio.to_thread call has created the default executor yet
+                asyncio.get_running_loop().set_default_executor(ProfiledThreadPoolExecutor())
+            return await self.app(scope, receive, send)
+        trigger = self._trigger(scope)
+        if trigger is None or self.active >= PROFILE_MAX_ACTIVE:
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.active += 1
+        sampler = StackSampler(asyncio.current_task())
+        token = _profiled_request.set(sampler)
+        started_at = datetime.now()
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - started) * 1000
+            _profiled_request.reset(token)
+            # Joining waits out the current sampling pass, so keep it off the event loop
+            await asyncio.to_thread(sampler.stop)
+            self.active -= 1
+            route = scope.get("route")
+            template = route.path if route is not None else scope["path"]
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", template).strip("_") or "root"
+            entry = {
+                "file": f"{started_at:%Y%m%dT%H%M%S%f}-{slug}-{int(latency_ms)}ms.collapsed",
+                "route": template,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "latency_ms": round(latency_ms, 3),
+                "samples": sampler.samples,
+                "trigger": trigger,
+                "started_at": started_at.isoformat(),
+            }
+            try:
+                await asyncio.to_thread(_write_profile, self.directory, entry, sampler.stacks)
+            except OSError:
+                logger.exception("Failed to write profile for %s", template)
@@ -0,0 +1,117 @@
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional
+
+from app.services.analytics_service import response_analytics
+from app.services.emergency_event_log import event_log
+
+
+class EmergencyResponses:
+    """Responder state for one emergency or simulation"""
+
+    __slots__ = (
+        "emergency_id", "started_at", "started_monotonic", "team", "is_simulation",
+        "responders", "response_times", "first_response_seconds", "_by_user",
+    )
+
+    def __init__(self, emergency_id: str, team: Optional[str], is_simulation: bool):
+        self.emergency_id = emergency_id
+        self.started_at = datetime.now().isoformat()
+        self.started_monotonic = time.monotonic()
+        self.team = team
+        self.is_simulation = is_simulation
+        # One entry per responder, updated in place as their status changes
+        self.responders: List[Dict[str, Any]] = []
+        # user_id -> seconds from the alert to that user's first response
+        self.response_times: Dict[str, float] = {}
+        self.first_response_seconds: Optional[float] = None
+        self._by_user: Dict[str, Dict[str, Any]] = {}
+
+
+class ResponderTracker:
+    """Records emergency_response messages per emergency in constant time.
+
+    Latency is measured when a message is received, so callers that need
+    responder lists or response times read them directly instead of scanning
+    message history.
+    """
+
+    def __init__(self):
+        self._emergencies: Dict[str, EmergencyResponses] = {}
+
+    def register(self, emergency_id: str, team: Optional[str] = None, is_simulation: bool = False) -> EmergencyResponses:
+        entry = self._emergencies.get(emergency_id)
+        if entry is None:
+            entry = EmergencyResponses(emergency_id, team, is_simulation)
+            self._emergencies[emergency_id] = entry
+        return entry
+
+    def get(self, emergency_id: str) -> Optional[EmergencyResponses]:
+        return self._emergencies.get(emergency_id)
+
+    def remove(self, emergency_id: str) -> Optional[EmergencyResponses]:
+        return self._emergencies.pop(emergency_id, None)
+
+    def restore(
+        self,
+        emergency_id: str,
+        started_at: str,
+        team: Optional[str] = None,
+        is_simulation: bool = False,
+        responders: Iterable[Dict[str, Any]] = (),
+    ) -> EmergencyResponses:
+        """Rebuild an entry from the event log after a restart, without feeding analytics again"""
+        entry = self.register(emergency_id, team, is_simulation)
+        entry.started_at = started_at
+        # Later responders are timed from the original alert, not from the restart
+        age = (datetime.now() - datetime.fromisoformat(started_at)).total_seconds()
+        entry.started_monotonic = time.monotonic() - max(0.0, age)
+        for responder in responders:
+            responder = dict(responder)
+            entry._by_user[responder["user_id"]] = responder
+            entry.responders.append(responder)
+            entry.response_times[responder["user_id"]] = responder["response_time_seconds"]
+        entry.first_response_seconds = min(entry.response_times.values(), default=None)
+        return entry
+
+    def record(
+        self,
+        emergency_id: str,
+        user_id: str,
+        role: str,
+        status: str = "responding",
+        eta: Optional[Any] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Record a responder update; returns the responder entry, or None for unknown emergencies"""
+        entry = self._emergencies.get(emergency_id)
+        if entry is None:
+            return None
+        now = datetime.now().isoformat()
+        responder = entry._by_user.get(user_id)
+        if responder is None:
+            elapsed = round(time.monotonic() - entry.started_monotonic, 3)
+            responder = {
+                "user_id": user_id,
+                "role": role,
+                "status": status,
+                "eta": eta,
+                "first_response_at": now,
+                "updated_at": now,
+                "response_time_seconds": elapsed,
+            }
+            entry._by_user[user_id] = responder
+            entry.responders.append(responder)
+            entry.response_times[user_id] = elapsed
+            if entry.first_response_seconds is None:
+                entry.first_response_seconds = elapsed
+            if entry.is_simulation:
+                response_analytics.record_drill_response(entry.team, entry.started_at, elapsed)
+        else:
+            responder["status"] = status
+            responder["eta"] = eta
+            responder["updated_at"] = now
+        event_log.append("responder_updated", emergency_id, responder)
+        return responder
+
+# Create a global instance of the responder tracker
+responder_tracker = ResponderTracker()
@@ -0,0 +1,108 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+# Payloads built from live vitals change at most once per sample interval
+SAMPLE_INTERVAL_SECONDS = float(os.environ.get("DASHBOARD_SAMPLE_INTERVAL_SECONDS", 5))
+# Mostly static payloads (schedules, protocols) are rebuilt rarely and invalidated explicitly
+STATIC_TTL_SECONDS = float(os.environ.get("DASHBOARD_STATIC_TTL_SECONDS", 300))
+# Per-user entries are kept for the most recently served users only
+MAX_ENTRIES = int(os.environ.get("DASHBOARD_CACHE_MAX_ENTRIES", 4096))
+
+CacheKey = Tuple[str, Optional[str]]
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, etag: str, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Strong comparison only: weak validators never match a strong ETag
+    return any(candidate.strip() == etag for candidate in if_none_match.split(","))
+
+
+class ResponseCache:
+    """Caches serialized JSON responses per (scope, user) with a TTL and strong ETags.
+
+    Holds at most max_entries entries, evicting the least recently served first.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _build_entry(self, payload: Any, ttl: float) -> CacheEntry:
+        # jsonable_encoder is only consulted for types orjson cannot serialize itself
+        body = orjson.dumps(payload, default=jsonable_encoder)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        return CacheEntry(body, etag, time.monotonic() + ttl)
+
+    def respond(
+        self,
+        request: Request,
+        scope: str,
+        build: Callable[[], Any],
+        ttl: float,
+        user_id: Optional[Any] = None,
+    ) -> Response:
+        """Serve the cached payload for (scope, user_id), rebuilding it once expired.
+
+        Pass user_id=None for payloads shared by everyone with the same role.
+        Answers 304 when the client's If-None-Match matches the current ETag.
+        """
+        key = (scope, str(user_id) if user_id is not None else None)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None or entry.expires_at <= now:
+            entry = self._build_entry(build(), ttl)
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": f"private, max-age={max(0, int(entry.expires_at - now))}",
+        }
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def invalidate(self, scope: Optional[str] = None, user_id: Optional[Any] = None) -> int:
+        """Drop cached entries matching scope and/or user_id; with no arguments, drop all.
+
+        Returns the number of entries removed.
+        """
+        user_key = str(user_id) if user_id is not None else None
+        with self._lock:
+            stale = [
+                key for key in self._entries
+                if (scope is None or key[0] == scope) and (user_key is None or key[1] == user_key)
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+# Create a global instance of the dashboard response cache
+dashboard_cache = ResponseCache()
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models.emergency_simulation import EmergencySimulation as EmergencySimulationModel
+from app.services.emergency_event_log import event_log
+
+logger = logging.getLogger(__name__)
+
+# How long a completed drill stays in memory before it is archived to the database
+SIMULATION_RETENTION_SECONDS = float(os.environ.get("SIMULATION_RETENTION_SECONDS", 3600))
+# How often completed drills past the retention window are archived
+SIMULATION_ARCHIVE_INTERVAL_SECONDS = float(os.environ.get("SIMULATION_ARCHIVE_INTERVAL_SECONDS", 60))
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class SimulationStore:
+    """Active and recently completed simulations, with completed ones archived to SQL.
+
+    Active drills are indexed per coach so listing only touches that coach's
+    drills. Completed drills are kept in completion order and, once older
+    than the retention window, written to the emergency_simulations table
+    and evicted, so memory stays bounded by recent activity.
+    """
+
+    def __init__(self, retention_seconds: float = SIMULATION_RETENTION_SECONDS):
+        self.retention_seconds = retention_seconds
+        self._simulations: Dict[str, Dict[str, Any]] = {}
+        self._active_by_coach: Dict[Any, Dict[str, Dict[str, Any]]] = {}
+        # simulation_id -> monotonic completion time, oldest first
+        self._completed: "OrderedDict[str, float]" = OrderedDict()
+        self._archiving = False
+
+    def add(self, simulation: Dict[str, Any]) -> None:
+        self._simulations[simulation["id"]] = simulation
+        coach_id = simulation["initiated_by"]["id"]
+        self._active_by_coach.setdefault(coach_id, {})[simulation["id"]] = simulation
+
+    def get(self, simulation_id: str) -> Optional[Dict[str, Any]]:
+        return self._simulations.get(simulation_id)
+
+    def ids(self) -> Set[str]:
+        return set(self._simulations)
+
+    def active_for(self, coach_id: Any) -> List[Dict[str, Any]]:
+        return list(self._active_by_coach.get(coach_id, {}).values())
+
+    def complete(self, simulation_id: str) -> None:
+        """Move a simulation from the active index to the retention queue"""
+        simulation = self._simulations[simulation_id]
+        coach_id = simulation["initiated_by"]["id"]
+        coach_active = self._active_by_coach.get(coach_id)
+        if coach_active is not None:
+            coach_active.pop(simulation_id, None)
+            if not coach_active:
+                del self._active_by_coach[coach_id]
+        self._completed[simulation_id] = time.monotonic()
+
+    def _expired(self, everything: bool = False) -> List[Dict[str, Any]]:
+        cutoff = time.monotonic() - self.retention_seconds
+        expired = []
+        for simulation_id, completed_at in self._completed.items():
+            if not everything and completed_at > cutoff:
+                break
+            expired.append(self._simulations[simulation_id])
+        return expired
+
+    @staticmethod
+    def _write_archive(simulations: List[Dict[str, Any]]) -> None:
+        db = SessionLocal()
+        try:
+            for simulation in simulations:
+                db.merge(EmergencySimulationModel(
+                    id=simulation["id"],
+                    initiated_by=simulation["initiated_by"]["id"],
+                    team=simulation.get("team"),
+                    athlete_name=simulation.get("athlete_name"),
+                    start_time=_parse_time(simulation["start_time"]),
+                    end_time=_parse_time(simulation.get("end_time")),
+                    duration_seconds=simulation.get("duration_seconds"),
+                    first_response_seconds=simulation.get("first_response_seconds"),
+                    simulation=simulation,
+                ))
+            db.commit()
+        finally:
+            db.close()
+
+    async def archive_expired(self, everything: bool = False) -> int:
+        """Archive completed drills past the retention window (or all of them) and evict them"""
+        if self._archiving:
+            return 0
+        expired = self._expired(everything)
+        if not expired:
+            return 0
+        self._archiving = True
+        try:
+            # Evict only after the commit, so a drill is always readable from memory or the archive
+            await asyncio.to_thread(self._write_archive, expired)
+        except Exception:
+            logger.exception("Failed to archive %d simulations", len(expired))
+            return 0
+        finally:
+            self._archiving = False
+        for simulation in expired:
+            self._completed.pop(simulation["id"], None)
+            self._simulations.pop(simulation["id"], None)
+            # Archived drills are read from SQL, so recovery no longer needs to restore them
+            event_log.append("simulation_archived", simulation["id"])
+        return len(expired)
+
+    async def archive_periodically(self, interval: float = SIMULATION_ARCHIVE_INTERVAL_SECONDS) -> None:
+        """Run archive_expired every interval seconds, until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            archived = await self.archive_expired()
+            if archived:
+                logger.info("Archived %d completed simulations", archived)
+
+    def get_archived(self, db: Session, simulation_id: str) -> Optional[Dict[str, Any]]:
+        row = db.get(EmergencySimulationModel, simulation_id)
+        return row.simulation if row is not None else None
+
+    def stats(self) -> Tuple[int, int]:
+        """(active, completed-in-memory) simulation counts"""
+        return len(self._simulations) - len(self._completed), len(self._completed)
+
+# Create a global instance of the simulation store
+simulation_store = SimulationStore()
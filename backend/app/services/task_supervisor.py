@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Any, Coroutine, Optional
+
+from app.services.metrics import background_queue_depth
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_TASKS = int(os.environ.get("MAX_BACKGROUND_TASKS", 64))
+# Tasks held at once, running or waiting for a slot; spawns past this are dropped
+MAX_PENDING_TASKS = int(os.environ.get("MAX_PENDING_BACKGROUND_TASKS", 1024))
+DRAIN_TIMEOUT_SECONDS = float(os.environ.get("BACKGROUND_DRAIN_TIMEOUT_SECONDS", 10))
+
+
+class TaskStats:
+    __slots__ = ("started", "completed", "failed", "cancelled", "dropped", "total_seconds", "max_seconds")
+
+    def __init__(self):
+        self.started = 0
+        self.dropped = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "dropped": self.dropped,
+            "avg_seconds": round(self.total_seconds / finished, 4) if finished else None,
+            "max_seconds": round(self.max_seconds, 4),
+        }
+
+
+class TaskSupervisor:
+    """Runs fire-and-forget coroutines with a registry, a concurrency cap and metrics.
+
+    spawn() returns at once; the task itself waits for a free slot, so at
+    most max_concurrency coroutines run at a time and the request that
+    spawned them never waits. At most max_pending tasks are held at once,
+    running or waiting; further spawns are dropped and counted. Every task is held in the registry until it
+    finishes, its exceptions are logged, and drain() lets in-flight work
+    finish on shutdown. start() accepts tasks again after a drain.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_TASKS, max_pending: int = MAX_PENDING_TASKS):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max(max_pending, max_concurrency)
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._tasks: Dict[asyncio.Task, str] = {}
+        self._stats: Dict[str, TaskStats] = {}
+        self._closing = False
+
+    def start(self) -> None:
+        """Accept tasks again, e.g. when the app starts up after an earlier drain"""
+        self._closing = False
+        if not self._tasks:
+            # A semaphore stays bound to the loop it was first contended on
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    def spawn(self, coro: Coroutine, name: str = "task") -> Optional[asyncio.Task]:
+        if self._closing:
+            coro.close()
+            logger.warning("Rejected background task %s: supervisor is draining", name)
+            return None
+        stats = self._stats.setdefault(name, TaskStats())
+        if len(self._tasks) >= self.max_pending:
+            coro.close()
+            stats.dropped += 1
+            logger.warning("Dropped background task %s: %d tasks already pending", name, len(self._tasks))
+            return None
+        stats.started += 1
+        task = asyncio.create_task(self._run(coro, name, stats), name=name)
+        self._tasks[task] = name
+        task.add_done_callback(self._on_done)
+        return task
+
+    async def _run(self, coro: Coroutine, name: str, stats: TaskStats) -> Any:
+        try:
+            await self._slots.acquire()
+        except asyncio.CancelledError:
+            coro.close()
+            stats.cancelled += 1
+            raise
+        started = time.perf_counter()
+        try:
+            result = await coro
+            stats.completed += 1
+            return result
+        except asyncio.CancelledError:
+            stats.cancelled += 1
+            raise
+        except Exception:
+            stats.failed += 1
+            logger.exception("Background task %s failed", name)
+        finally:
+            self._slots.release()
+            elapsed = time.perf_counter() - started
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._tasks.pop(task, None)
+
+    @property
+    def accepting(self) -> bool:
+        return not self._closing
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "max_pending": self.max_pending,
+            "tasks": {name: stats.to_dict() for name, stats in self._stats.items()},
+        }
+
+    async def drain(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> None:
+        """Stop accepting tasks and wait for in-flight ones; cancel what is left after timeout"""
+        self._closing = True
+        pending = list(self._tasks)
+        if not pending:
+            return
+        logger.info("Draining %d background tasks", len(pending))
+        done, still_running = await asyncio.wait(pending, timeout=timeout)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            logger.warning("Cancelled %d background tasks after %.1fs drain", len(still_running), timeout)
+            await asyncio.gather(*still_running, return_exceptions=True)
+
+# Create a global instance of the task supervisor
+task_supervisor = TaskSupervisor()
+background_queue_depth.labels("supervised_tasks").set_function(lambda: task_supervisor.in_flight)
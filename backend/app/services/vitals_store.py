@@ -0,0 +1,451 @@
+import os
+import asyncio
+import logging
+import mmap
+import struct
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+# Columnar, append-only storage for high-rate vital sign samples.
+#
+# Each athlete gets a directory of immutable segment files. A segment holds a
+# fixed-width int64 timestamp column (epoch milliseconds) followed by one
+# float32 column per vital sign, then a sparse time index. Segments are read
+# back through mmap so history queries hand out memoryview slices of the file
+# instead of building ORM rows. Full batches are written by a background
+# thread, and a periodic task merges old segments so the file count stays
+# bounded.
+
+logger = logging.getLogger(__name__)
+
+VITALS_DATA_DIR = os.environ.get("VITALS_DATA_DIR", "./vitals_data")
+# Segments kept memory-mapped at once; the least recently used are unmapped beyond this
+VITALS_MAX_OPEN_SEGMENTS = int(os.environ.get("VITALS_MAX_OPEN_SEGMENTS", 256))
+# Segments older than this are merged into larger ones, every interval
+VITALS_COMPACT_AFTER_SECONDS = float(os.environ.get("VITALS_COMPACT_AFTER_SECONDS", 3600))
+VITALS_COMPACT_INTERVAL_SECONDS = float(os.environ.get("VITALS_COMPACT_INTERVAL_SECONDS", 600))
+# Compaction never grows a segment past this many rows (about 2 MB)
+VITALS_SEGMENT_MAX_ROWS = int(os.environ.get("VITALS_SEGMENT_MAX_ROWS", 65536))
+
+# Value columns stored in every segment, in on-disk order
+VITAL_COLUMNS = (
+    "heart_rate",
+    "systolic_bp",
+    "diastolic_bp",
+    "body_temperature",
+    "respiratory_rate",
+    "oxygen_saturation",
+)
+
+SEGMENT_MAGIC = b"VSEG"
+SEGMENT_VERSION = 1
+SEGMENT_SUFFIX = ".vseg"
+# magic, version, column count, row count, index entry count, min ts, max ts
+SEGMENT_HEADER = struct.Struct("<4sHHIIqq")
+# One sparse index entry is kept for every INDEX_STRIDE rows
+INDEX_STRIDE = 64
+DEFAULT_BATCH_SIZE = 256
+
+
+def _pad8(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def to_epoch_ms(value: Any) -> int:
+    """Convert a datetime, ISO string or epoch milliseconds into epoch milliseconds"""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp() * 1000)
+    return int(value)
+
+
+def sample_to_row(sample: Dict[str, Any]) -> Tuple[int, List[float]]:
+    """Flatten a vital signs dict (as produced by the dashboard) into a columnar row"""
+    values = {column: float("nan") for column in VITAL_COLUMNS}
+    for column in VITAL_COLUMNS:
+        if sample.get(column) is not None:
+            values[column] = float(sample[column])
+    blood_pressure = sample.get("blood_pressure")
+    if isinstance(blood_pressure, str) and "/" in blood_pressure:
+        systolic, diastolic = blood_pressure.split("/", 1)
+        values["systolic_bp"] = float(systolic)
+        values["diastolic_bp"] = float(diastolic)
+    timestamp = to_epoch_ms(sample.get("timestamp") or datetime.now())
+    return timestamp, [values[column] for column in VITAL_COLUMNS]
+
+
+class Segment:
+    """A read-only view over one segment file, memory-mapped while open"""
+
+    def __init__(self, path: str):
+        self.path = path
+        # Only the header is read up front; the file is mapped by open()
+        with open(path, "rb") as f:
+            header = f.read(SEGMENT_HEADER.size)
+        magic, version, ncols, rows, index_len, min_ts, max_ts = SEGMENT_HEADER.unpack(header)
+        if magic != SEGMENT_MAGIC or version != SEGMENT_VERSION or ncols != len(VITAL_COLUMNS):
+            raise ValueError(f"Unsupported vitals segment: {path}")
+        self.rows = rows
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self._index_len = index_len
+        self._mmap: Optional[mmap.mmap] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._mmap is not None
+
+    def open(self) -> None:
+        if self._mmap is not None:
+            return
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        rows = self.rows
+        view = memoryview(self._mmap)
+        offset = SEGMENT_HEADER.size
+        self.timestamps = view[offset:offset + rows * 8].cast("q")
+        offset += rows * 8
+        self.columns: Dict[str, memoryview] = {}
+        for column in VITAL_COLUMNS:
+            self.columns[column] = view[offset:offset + rows * 4].cast("f")
+            offset += rows * 4
+        offset = _pad8(offset)
+        # The sparse index is tiny, so keep it as plain lists for bisect
+        index = view[offset:offset + self._index_len * 8].cast("q")
+        self._index_ts = index.tolist()
+        self._index_rows = list(range(0, rows, INDEX_STRIDE))
+
+    def close(self) -> None:
+        if self._mmap is None:
+            return
+        mapping = self._mmap
+        self._mmap = None
+        self.timestamps = None
+        self.columns = {}
+        try:
+            mapping.close()
+        except BufferError:
+            # Slices handed out by query() still use the mapping; it is unmapped when they are released
+            pass
+
+    def _seek(self, ts: int, right: bool) -> int:
+        """Find the row position for ts using the sparse index, then the column"""
+        if right:
+            block = bisect_right(self._index_ts, ts)
+        else:
+            block = bisect_left(self._index_ts, ts)
+        lo = self._index_rows[block - 1] if block > 0 else 0
+        hi = self._index_rows[block] if block < len(self._index_rows) else self.rows
+        if right:
+            return bisect_right(self.timestamps, ts, lo, hi)
+        return bisect_left(self.timestamps, ts, lo, hi)
+
+    def slice(self, start_ts: Optional[int], end_ts: Optional[int]) -> "VitalsSlice":
+        lo = 0 if start_ts is None else self._seek(start_ts, right=False)
+        hi = self.rows if end_ts is None else self._seek(end_ts, right=True)
+        return VitalsSlice(
+            self.timestamps[lo:hi],
+            {column: values[lo:hi] for column, values in self.columns.items()},
+        )
+
+
+class VitalsSlice:
+    """Columnar slice of samples; columns are memoryviews or arrays, never copied rows"""
+
+    def __init__(self, timestamps, columns: Dict[str, Any]):
+        self.timestamps = timestamps
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def to_dict(self) -> Dict[str, List[Any]]:
+        result = {"timestamps": self.timestamps.tolist()}
+        for column, values in self.columns.items():
+            # NaN marks a missing value and is not valid JSON
+            result[column] = [None if v != v else round(v, 2) for v in values.tolist()]
+        return result
+
+
+def write_segment(path: str, timestamps: array, columns: List[array]) -> None:
+    """Write a complete segment file atomically"""
+    rows = len(timestamps)
+    index = array("q", timestamps[::INDEX_STRIDE])
+    header = SEGMENT_HEADER.pack(
+        SEGMENT_MAGIC, SEGMENT_VERSION, len(columns), rows, len(index),
+        timestamps[0], timestamps[-1],
+    )
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(timestamps.tobytes())
+        written = SEGMENT_HEADER.size + rows * 8
+        for values in columns:
+            f.write(values.tobytes())
+            written += rows * 4
+        f.write(b"\0" * (_pad8(written) - written))
+        f.write(index.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class VitalsStore:
+    def __init__(
+        self,
+        data_dir: str = VITALS_DATA_DIR,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_open_segments: int = VITALS_MAX_OPEN_SEGMENTS,
+        max_segment_rows: int = VITALS_SEGMENT_MAX_ROWS,
+    ):
+        self.data_dir = data_dir
+        self.batch_size = batch_size
+        self.max_open_segments = max_open_segments
+        self.max_segment_rows = max_segment_rows
+        self._lock = threading.Lock()
+        # Serializes compactions, which do their file work outside _lock
+        self._compact_lock = threading.Lock()
+        # Known segments per athlete, sorted by min timestamp
+        self._segments: Dict[str, List[Segment]] = {}
+        # Memory-mapped segments, least recently used first
+        self._open: "OrderedDict[str, Segment]" = OrderedDict()
+        # Samples not yet written to a segment, kept columnar as well
+        self._buffers: Dict[str, Tuple[array, List[array]]] = {}
+        # Full batches handed to the writer thread, readable until their segment is loaded
+        self._sealed: Dict[str, List[Tuple[array, List[array]]]] = {}
+        self._writes: List[Future] = []
+        # One thread, so segment files and fsyncs never run on the event loop and land in order
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vitals-writer")
+        # Newest timestamp seen per athlete, buffered or on disk
+        self._last_ts: Dict[str, int] = {}
+
+    def _athlete_dir(self, athlete_id: str) -> str:
+        return os.path.join(self.data_dir, str(athlete_id))
+
+    def _load_segments(self, athlete_id: str) -> List[Segment]:
+        segments = self._segments.get(athlete_id)
+        if segments is None:
+            segments = []
+            directory = self._athlete_dir(athlete_id)
+            if os.path.isdir(directory):
+                for name in sorted(os.listdir(directory)):
+                    if name.endswith(SEGMENT_SUFFIX):
+                        segments.append(Segment(os.path.join(directory, name)))
+            segments.sort(key=lambda s: s.min_ts)
+            self._segments[athlete_id] = segments
+        return segments
+
+    def _new_segment_path(self, athlete_id: str, min_ts: int, max_ts: int) -> str:
+        directory = self._athlete_dir(athlete_id)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{min_ts:016d}-{max_ts:016d}{SEGMENT_SUFFIX}")
+
+    def append(self, athlete_id: str, sample: Dict[str, Any]) -> None:
+        """Buffer one sample; a segment is written once batch_size samples are buffered"""
+        athlete_id = str(athlete_id)
+        timestamp, values = sample_to_row(sample)
+        with self._lock:
+            if athlete_id not in self._last_ts:
+                segments = self._load_segments(athlete_id)
+                if segments:
+                    self._last_ts[athlete_id] = segments[-1].max_ts
+            # Segments are append-only, so drop samples older than what is stored
+            if timestamp < self._last_ts.get(athlete_id, timestamp):
+                return
+            self._last_ts[athlete_id] = timestamp
+
+            buffer = self._buffers.get(athlete_id)
+            if buffer is None:
+                buffer = (array("q"), [array("f") for _ in VITAL_COLUMNS])
+                self._buffers[athlete_id] = buffer
+            timestamps, columns = buffer
+            timestamps.append(timestamp)
+            for column, value in zip(columns, values):
+                column.append(value)
+            if len(timestamps) >= self.batch_size:
+                self._seal(athlete_id)
+
+    def _seal(self, athlete_id: str) -> None:
+        """Hand the athlete's buffer to the writer thread; call with the lock held"""
+        buffer = self._buffers.pop(athlete_id, None)
+        if not buffer or not buffer[0]:
+            return
+        self._sealed.setdefault(athlete_id, []).append(buffer)
+        self._writes = [write for write in self._writes if not write.done()]
+        self._writes.append(self._writer.submit(self._write_batch, athlete_id, buffer))
+
+    def _write_batch(self, athlete_id: str, buffer: Tuple[array, List[array]]) -> None:
+        timestamps, columns = buffer
+        try:
+            path = self._new_segment_path(athlete_id, timestamps[0], timestamps[-1])
+            write_segment(path, timestamps, columns)
+        except OSError:
+            # The batch stays sealed, so it is still served from memory
+            logger.exception("Failed to write vitals segment for athlete %s", athlete_id)
+            raise
+        with self._lock:
+            segments = self._load_segments(athlete_id)
+            if all(segment.path != path for segment in segments):
+                segments.append(Segment(path))
+                segments.sort(key=lambda s: s.min_ts)
+            sealed = [other for other in self._sealed.get(athlete_id, []) if other is not buffer]
+            if sealed:
+                self._sealed[athlete_id] = sealed
+            else:
+                self._sealed.pop(athlete_id, None)
+
+    def _use(self, segment: Segment) -> Segment:
+        """Map a segment for reading, unmapping the least recently used beyond the cap"""
+        segment.open()
+        self._open[segment.path] = segment
+        self._open.move_to_end(segment.path)
+        while len(self._open) > self.max_open_segments:
+            _, oldest = self._open.popitem(last=False)
+            oldest.close()
+        return segment
+
+    def flush(self, athlete_id: Optional[str] = None) -> None:
+        """Write buffered samples to disk for one athlete, or for all of them, and wait for the writes"""
+        with self._lock:
+            athlete_ids = [str(athlete_id)] if athlete_id is not None else list(self._buffers)
+            for buffered_id in athlete_ids:
+                self._seal(buffered_id)
+            pending = list(self._writes)
+        for write in pending:
+            try:
+                write.result()
+            except OSError:
+                pass
+
+    def query(self, athlete_id: str, start: Any = None, end: Any = None) -> List[VitalsSlice]:
+        """Return the samples in [start, end] as a list of zero-copy column slices"""
+        athlete_id = str(athlete_id)
+        start_ts = to_epoch_ms(start) if start is not None else None
+        end_ts = to_epoch_ms(end) if end is not None else None
+        with self._lock:
+            slices = []
+            for segment in self._load_segments(athlete_id):
+                if start_ts is not None and segment.max_ts < start_ts:
+                    continue
+                if end_ts is not None and segment.min_ts > end_ts:
+                    break
+                part = self._use(segment).slice(start_ts, end_ts)
+                if len(part):
+                    slices.append(part)
+
+            # Batches still being written, then the open buffer, are newer than any segment
+            buffers = list(self._sealed.get(athlete_id, []))
+            if athlete_id in self._buffers:
+                buffers.append(self._buffers[athlete_id])
+            for timestamps, columns in buffers:
+                lo = 0 if start_ts is None else bisect_left(timestamps, start_ts)
+                hi = len(timestamps) if end_ts is None else bisect_right(timestamps, end_ts)
+                if hi > lo:
+                    # The buffers are still mutable, so these tails are the only copies made
+                    slices.append(VitalsSlice(
+                        timestamps[lo:hi],
+                        {name: values[lo:hi] for name, values in zip(VITAL_COLUMNS, columns)},
+                    ))
+            return slices
+
+    def _merge_groups(self, segments: List[Segment], cutoff: Optional[int], min_segments: int) -> List[List[Segment]]:
+        """Runs of adjacent old segments to merge, each holding at most max_segment_rows rows.
+
+        Segments that are already full are never picked again, so old history
+        is not rewritten on every pass.
+        """
+        groups: List[List[Segment]] = []
+        run: List[Segment] = []
+        rows = 0
+        for segment in segments:
+            if cutoff is not None and segment.max_ts >= cutoff:
+                break
+            if run and rows + segment.rows > self.max_segment_rows:
+                groups.append(run)
+                run, rows = [], 0
+            if segment.rows >= self.max_segment_rows:
+                continue
+            run.append(segment)
+            rows += segment.rows
+        groups.append(run)
+        return [group for group in groups if len(group) >= min_segments]
+
+    def compact(self, athlete_id: str, older_than: Any = None, min_segments: int = 2) -> int:
+        """Merge runs of small segments that end before older_than into segments of up to max_segment_rows rows.
+
+        The merged files are read and written without holding the store lock,
+        which is taken only to swap them into the segment list, so appends and
+        queries carry on during a compaction. Returns the number of segments
+        that were merged.
+        """
+        athlete_id = str(athlete_id)
+        cutoff = to_epoch_ms(older_than) if older_than is not None else None
+        merged = 0
+        with self._compact_lock:
+            with self._lock:
+                groups = self._merge_groups(list(self._load_segments(athlete_id)), cutoff, min_segments)
+            for group in groups:
+                # Segment files are immutable and only compaction removes them, so they can be read unlocked
+                timestamps = array("q")
+                columns = [array("f") for _ in VITAL_COLUMNS]
+                for old in group:
+                    segment = Segment(old.path)
+                    segment.open()
+                    try:
+                        timestamps.frombytes(segment.timestamps.tobytes())
+                        for values, column in zip(columns, VITAL_COLUMNS):
+                            values.frombytes(segment.columns[column].tobytes())
+                    finally:
+                        segment.close()
+                path = self._new_segment_path(athlete_id, timestamps[0], timestamps[-1])
+                write_segment(path, timestamps, columns)
+
+                merged_paths = {segment.path for segment in group}
+                with self._lock:
+                    # The writer thread may have added segments meanwhile; keep those
+                    remaining = [s for s in self._load_segments(athlete_id) if s.path not in merged_paths]
+                    remaining.append(Segment(path))
+                    remaining.sort(key=lambda s: s.min_ts)
+                    self._segments[athlete_id] = remaining
+                    for segment in group:
+                        self._open.pop(segment.path, None)
+                        # Existing slices keep the old mappings alive until they are released
+                        segment.close()
+                for segment in group:
+                    if segment.path != path:
+                        os.remove(segment.path)
+                merged += len(group)
+        return merged
+
+    def compact_all(self, older_than: Any = None) -> int:
+        """Compact every athlete with data on disk; returns the number of segments merged"""
+        if older_than is None:
+            older_than = int((time.time() - VITALS_COMPACT_AFTER_SECONDS) * 1000)
+        if not os.path.isdir(self.data_dir):
+            return 0
+        merged = 0
+        for athlete_id in os.listdir(self.data_dir):
+            if os.path.isdir(self._athlete_dir(athlete_id)):
+                merged += self.compact(athlete_id, older_than)
+        return merged
+
+    async def compact_periodically(self, interval: float = VITALS_COMPACT_INTERVAL_SECONDS) -> None:
+        """Run compact_all in a worker thread every interval seconds, until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                merged = await asyncio.to_thread(self.compact_all)
+                if merged:
+                    logger.info("Compacted %d vitals segments", merged)
+            except Exception:
+                logger.exception("Vitals compaction failed")
+
+# Create a global instance of the vitals store
+vitals_store = VitalsStore()
@@ -0,0 +1,75 @@
+"""
+Benchmark suite for the backend's hot paths, run in-process against a
+temporary SQLite database.
+
+    python -m benchmarks --save benchmarks/baselines/local.json
+    python -m benchmarks --compare benchmarks/baselines/local.json --threshold 0.15
+
+--compare exits with status 1 if any benchmark's median time is more than
+threshold slower than the baseline.
+"""
+
+import argparse
+import asyncio
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+# Everything runs against a throwaway database and key; set before the app is imported
+_workdir = tempfile.mkdtemp(prefix="stomp-bench-")
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'bench.db')}"
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret-key")
+os.environ["VITALS_DATA_DIR"] = os.path.join(_workdir, "vitals")
+os.environ["EMERGENCY_EVENT_LOG"] = os.path.join(_workdir, "emergency_events.log")
+os.environ.pop("REPLICA_DATABASE_URLS", None)
+os.environ.pop("PROFILE_SAMPLE_RATE", None)
+os.environ.pop("PROFILE_DEBUG_TOKEN", None)
+
+
+async def _run(names, scale):
+    from app.main import app
+    from app.database import init_db
+    from benchmarks.cases import build_benchmarks
+    from benchmarks.harness import run_benchmark, format_seconds
+
+    init_db()
+    results = {}
+    for bench in build_benchmarks(app):
+        if names and not any(name in bench.name for name in names):
+            continue
+        result = await run_benchmark(bench, scale)
+        results[bench.name] = result
+        print(f"{bench.name:44} {format_seconds(result['median_seconds']):>12}  (min {format_seconds(result['min_seconds'])}, {result['samples']} samples)", flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the backend benchmark suite")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="slowdown that counts as a regression (0.15 = 15%%)")
+    parser.add_argument("--filter", action="append", default=[], help="only run benchmarks whose name contains this")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply samples and iterations, e.g. 0.2 for a quick run")
+    args = parser.parse_args()
+
+    from benchmarks.harness import save_results, compare
+
+    results = asyncio.run(_run(args.filter, args.scale))
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        save_results(args.save, results)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        lines, regressions = compare(args.compare, results, args.threshold)
+        print()
+        print("\n".join(lines))
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+
+from benchmarks.harness import Benchmark
+
+# Benchmarks for the backend's hot paths. The environment (temporary SQLite
+# database, JWT secret) is prepared by benchmarks/__main__.py before the app
+# is imported.
+
+NOTIFICATION_COUNT = 10000
+CONTACT_LIST_SIZE = 1000
+BROADCAST_SIZES = (10, 1000, 10000)
+
+
+async def asgi_call(app, method: str, path: str, token: str, body: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes]:
+    """Call the ASGI app in-process and return (status, body)"""
+    path, _, query = path.partition("?")
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())]
+    if body is not None:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    sent = False
+    status_code = 500
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status_code, b"".join(chunks)
+
+
+def _check(status_code: int, expected: int = 200) -> None:
+    if status_code != expected:
+        raise RuntimeError(f"Unexpected status {status_code}, expected {expected}")
+
+
+class NullSocket:
+    """A WebSocket stand-in whose sends cost nothing, so only the fan-out itself is timed"""
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        pass
+
+    async def send_bytes(self, data: bytes) -> None:
+        pass
+
+
+def _user(email: str, role: str):
+    from app.database import SessionLocal
+    from app.models.user import UserCreate, UserRole
+    from app.services.auth_service import create_access_token
+    from app.services.user_service import create_user, get_user_by_email
+
+    db = SessionLocal()
+    try:
+        user = get_user_by_email(db, email) or create_user(db, UserCreate(email=email, password="bench-password", role=UserRole(role)))
+        token = create_access_token({"sub": user.email, "id": user.id, "role": user.role.value}, timedelta(hours=1))
+        return user.id, token
+    finally:
+        db.close()
+
+
+def build_benchmarks(app) -> List[Benchmark]:
+    from app.services import auth_service
+    from app.services.emergency_alert_service import ConnectionManager
+    from app.api.dashboard import build_coach_dashboard
+
+    benchmarks: List[Benchmark] = []
+
+    # Tokens
+    async def token_setup():
+        return auth_service.create_access_token({"sub": "bench@x", "id": 1, "role": "coach"})
+
+    async def create_token(_):
+        auth_service.create_access_token({"sub": "bench@x", "id": 1, "role": "coach"})
+
+    async def decode_token(token):
+        auth_service.decode_access_token(token)
+
+    benchmarks.append(Benchmark("auth.create_access_token", create_token, inner=1000))
+    benchmarks.append(Benchmark("auth.decode_access_token", decode_token, token_setup, inner=1000))
+
+    # Password verification at the configured bcrypt cost
+    async def password_setup():
+        return auth_service.get_password_hash("bench-password")
+
+    async def verify(hashed):
+        auth_service.verify_password("bench-password", hashed)
+
+    benchmarks.append(Benchmark("auth.verify_password", verify, password_setup, samples=5))
+
+    # Emergency contact CRUD through the router
+    async def contacts_setup():
+        _, token = _user("bench-contacts@example.com", "athlete")
+        return token
+
+    async def contact_crud(token):
+        body = {"name": "Jane Doe", "phone_number": "555-0100", "relationship": "Parent"}
+        status_code, raw = await asgi_call(app, "POST", "/api/emergency-contacts/", token, body)
+        _check(status_code, 201)
+        contact_id = json.loads(raw)["id"]
+        _check((await asgi_call(app, "GET", f"/api/emergency-contacts/{contact_id}", token))[0])
+        _check((await asgi_call(app, "PUT", f"/api/emergency-contacts/{contact_id}", token, {**body, "name": "John Doe"}))[0])
+        _check((await asgi_call(app, "GET", "/api/emergency-contacts/", token))[0])
+        _check((await asgi_call(app, "DELETE", f"/api/emergency-contacts/{contact_id}", token))[0])
+
+    benchmarks.append(Benchmark("contacts.crud_cycle", contact_crud, contacts_setup, inner=5))
+
+    # Large list responses
+    async def contact_list_setup():
+        from app.database import SessionLocal
+        from app.models.emergency_contact import EmergencyContact
+
+        user_id, token = _user("bench-contact-list@example.com", "athlete")
+        db = SessionLocal()
+        try:
+            db.add_all(
+                EmergencyContact(name=f"Contact {n}", phone_number=f"555-{n:04d}", relationship="Friend", user_id=user_id)
+                for n in range(CONTACT_LIST_SIZE)
+            )
+            db.commit()
+        finally:
+            db.close()
+        return token
+
+    async def contact_list(token):
+        _check((await asgi_call(app, "GET", f"/api/emergency-contacts/?limit={CONTACT_LIST_SIZE}", token))[0])
+
+    benchmarks.append(Benchmark(f"contacts.list_{CONTACT_LIST_SIZE}", contact_list, contact_list_setup, inner=10))
+
+    # Notification feed with 10k stored notifications, seeded once for both page sizes
+    seeded: Dict[str, str] = {}
+
+    async def notifications_setup():
+        from app.database import SessionLocal
+        from app.services.notification_service import create_notification
+
+        if "token" in seeded:
+            return seeded["token"]
+        user_id, token = _user("bench-feed@example.com", "athlete")
+        seeded["token"] = token
+        db = SessionLocal()
+        try:
+            for n in range(NOTIFICATION_COUNT):
+                # A mix of broadcast, role-targeted and direct notifications
+                kind = n % 3
+                create_notification(
+                    db, f"Notification {n}", "Benchmark notification", "info", None,
+                    target_roles=["athlete"] if kind == 1 else None,
+                    target_user_ids=[user_id] if kind == 2 else None,
+                )
+        finally:
+            db.close()
+        return token
+
+    async def notification_feed(token):
+        _check((await asgi_call(app, "GET", "/api/notifications/notifications/?limit=20", token))[0])
+
+    benchmarks.append(Benchmark("notifications.get_notifications_10k", notification_feed, notifications_setup, inner=20))
+
+    async def notification_page(token):
+        _check((await asgi_call(app, "GET", "/api/notifications/notifications/?limit=100", token))[0])
+
+    benchmarks.append(Benchmark("notifications.get_notifications_10k_page_100", notification_page, notifications_setup, inner=10))
+
+    # Alert fan-out to fake sockets
+    for size in BROADCAST_SIZES:
+        async def broadcast_setup(size=size):
+            manager = ConnectionManager()
+            roles = ("coach", "referee", "teammate", "athlete")
+            for n in range(size):
+                await manager.connect(NullSocket(), f"bench-{n}", roles[n % len(roles)])
+            return manager
+
+        async def broadcast(manager):
+            await manager.broadcast_emergency_alert({
+                "id": "bench-emergency",
+                "athlete_id": "bench-3",
+                "athlete_name": "Bench Athlete",
+                "detected_at": datetime.now().isoformat(),
+                "location": {"latitude": 37.7749, "longitude": -122.4194, "description": "Field 1"},
+                "vital_signs": {"heart_rate": 180, "blood_pressure": "160/100", "oxygen_saturation": 88},
+            })
+            manager.resolve_emergency("bench-emergency")
+
+        benchmarks.append(Benchmark(
+            f"alerts.broadcast_{size}_sockets", broadcast, broadcast_setup,
+            inner=max(1, 1000 // size), samples=10,
+        ))
+
+    # Coach dashboard generation
+    async def coach_dashboard(_):
+        build_coach_dashboard()
+
+    benchmarks.append(Benchmark("dashboard.build_coach_dashboard", coach_dashboard, inner=100))
+
+    return benchmarks
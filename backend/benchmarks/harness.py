@@ -0,0 +1,100 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Awaitable, Callable, Optional, Tuple
+
+
+class Benchmark:
+    """One timed operation.
+
+    func runs `inner` times per sample; each sample's time is divided by
+    inner to give seconds per operation. setup runs once before timing and
+    its return value is passed to func.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Awaitable[None]],
+        setup: Optional[Callable[[], Awaitable[Any]]] = None,
+        inner: int = 1,
+        samples: int = 10,
+        warmup: int = 1,
+    ):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.inner = inner
+        self.samples = samples
+        self.warmup = warmup
+
+
+async def run_benchmark(bench: Benchmark, scale: float = 1.0) -> Dict[str, Any]:
+    context = await bench.setup() if bench.setup is not None else None
+    for _ in range(bench.warmup):
+        await bench.func(context)
+    inner = max(1, int(bench.inner * scale))
+    timings: List[float] = []
+    for _ in range(max(3, int(bench.samples * scale))):
+        started = time.perf_counter()
+        for _ in range(inner):
+            await bench.func(context)
+        timings.append((time.perf_counter() - started) / inner)
+    timings.sort()
+    return {
+        "median_seconds": statistics.median(timings),
+        "min_seconds": timings[0],
+        "max_seconds": timings[-1],
+        "stdev_seconds": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "ops_per_second": 1 / statistics.median(timings) if timings[0] > 0 else None,
+        "samples": len(timings),
+        "inner": inner,
+    }
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "recorded_at": datetime.now().isoformat(),
+    }
+
+
+def save_results(path: str, results: Dict[str, Any]) -> None:
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2, sort_keys=True)
+
+
+def compare(baseline_path: str, results: Dict[str, Any], threshold: float) -> Tuple[List[str], List[str]]:
+    """Compare median times with a saved baseline; returns (report lines, regressed benchmark names)"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    lines = [f"{'benchmark':44} {'baseline':>12} {'current':>12} {'change':>9}"]
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            lines.append(f"{name:44} {'-':>12} {format_seconds(current['median_seconds']):>12} {'new':>9}")
+            continue
+        change = current["median_seconds"] / before["median_seconds"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  faster"
+        lines.append(
+            f"{name:44} {format_seconds(before['median_seconds']):>12} {format_seconds(current['median_seconds']):>12} {change:>+8.1%}{flag}"
+        )
+    return lines, regressions
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.3f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.3f}ms"
+    return f"{seconds * 1e6:.2f}us"
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Import-time report: imports the app in a fresh interpreter under
+`python -X importtime` and lists where the cold-start time goes, per module
+and per top-level package.
+
+    python import_report.py                      # app.main, top 25 modules
+    python import_report.py --module app.api.auth --top 10
+    python import_report.py --json import-report.json --budget-ms 600
+
+--budget-ms exits with status 1 when the import takes longer, so the report
+can guard cold-start latency in CI.
+"""
+
+import argparse
+import json
+import os
+import re
+import secrets
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Any
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent / ".env"
+load_dotenv(env_path)
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)")
+
+
+def measure(module: str) -> Dict[str, Any]:
+    """Import module in a fresh interpreter; returns per-module self/cumulative microseconds and wall time"""
+    env = dict(os.environ)
+    # The app refuses to import without a JWT key; the report never issues tokens
+    env.setdefault("JWT_SECRET_KEY", secrets.token_hex(32))
+    env.setdefault("DB_AUTO_CREATE", "false")
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - started)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=Path(__file__).parent, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    modules: Dict[str, Dict[str, int]] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            modules[name] = {"self_us": int(self_us), "cumulative_us": int(cumulative_us)}
+    return {"wall_seconds": float(result.stdout.strip().splitlines()[-1]), "modules": modules}
+
+
+def summarize(runs: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    """Median over runs of each module's self time, plus totals per top-level package"""
+    names = runs[0]["modules"].keys()
+    modules = []
+    for name in names:
+        self_us = statistics.median(run["modules"].get(name, {}).get("self_us", 0) for run in runs)
+        cumulative_us = statistics.median(run["modules"].get(name, {}).get("cumulative_us", 0) for run in runs)
+        modules.append({"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000})
+    packages: Dict[str, float] = defaultdict(float)
+    for entry in modules:
+        packages[entry["module"].split(".")[0]] += entry["self_ms"]
+    return {
+        "wall_ms": statistics.median(run["wall_seconds"] for run in runs) * 1000,
+        "module_count": len(modules),
+        "modules": sorted(modules, key=lambda entry: entry["self_ms"], reverse=True)[:top],
+        "packages": [
+            {"package": name, "self_ms": total}
+            for name, total in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-module import cost of the app")
+    parser.add_argument("--module", default="app.main", help="module to import")
+    parser.add_argument("--top", type=int, default=25, help="rows to show per table")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to take the median over")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    parser.add_argument("--budget-ms", type=float, help="exit 1 if the import takes longer than this")
+    args = parser.parse_args()
+
+    report = summarize([measure(args.module) for _ in range(max(1, args.runs))], args.top)
+    report["module"] = args.module
+
+    print(f"import {args.module}: {report['wall_ms']:.1f}ms wall, {report['module_count']} modules (median of {args.runs} runs)\n")
+    print(f"{'package':40} {'self':>10}")
+    for entry in report["packages"]:
+        print(f"{entry['package']:40} {entry['self_ms']:>8.1f}ms")
+    print(f"\n{'module':56} {'self':>10} {'cumulative':>12}")
+    for entry in report["modules"]:
+        print(f"{entry['module']:56} {entry['self_ms']:>8.1f}ms {entry['cumulative_ms']:>10.1f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.budget_ms is not None and report["wall_ms"] > args.budget_ms:
+        print(f"\nImport took {report['wall_ms']:.1f}ms, over the {args.budget_ms:.0f}ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Create the database tables. Run once per deploy when the app is started with
+DB_AUTO_CREATE=false (the serverless entry points), since it no longer
+creates them on import.
+"""
+
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent / ".env"
+load_dotenv(env_path)
+
+if __name__ == "__main__":
+    from app.database import init_db, DATABASE_URL
+    init_db()
+    print(f"Database tables created at {DATABASE_URL.split('@')[-1]}")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Drill load generator: fires simulated emergencies at in-process fake WebSocket
+clients and reports trigger-to-delivery latency, throughput and dropped frames.
+Everything runs locally against the app object; no server is started.
+"""
+
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import secrets
+import shutil
+import tempfile
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent / ".env"
+load_dotenv(env_path)
+
+# Tokens never leave this process, so a throwaway key is fine when none is configured
+os.environ.setdefault("JWT_SECRET_KEY", secrets.token_hex(32))
+# Drill events go to a throwaway log so the server does not restore them on its next start
+_event_log_dir = tempfile.mkdtemp(prefix="stomp-drill-")
+atexit.register(shutil.rmtree, _event_log_dir, ignore_errors=True)
+os.environ.setdefault("EMERGENCY_EVENT_LOG", os.path.join(_event_log_dir, "emergency_events.log"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the emergency alert path")
+    parser.add_argument("--emergencies", type=int, default=50, help="simulated emergencies to start")
+    parser.add_argument("--clients-per-role", type=int, default=25, help="fake WebSocket clients per role")
+    parser.add_argument("--concurrency", type=int, default=10, help="start requests in flight at once")
+    parser.add_argument("--send-delay-ms", type=float, default=0.0, help="per-frame delay of each fake client")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for all deliveries")
+    parser.add_argument("--encoding", choices=("json", "msgpack"), default="json", help="frame encoding of the fake clients")
+    parser.add_argument("--deflate", action="store_true", help="fake clients negotiate deflate compression")
+    parser.add_argument("--keep-simulations", action="store_true", help="do not end the simulations afterwards")
+    args = parser.parse_args()
+
+    from app.main import app
+    from app.database import init_db
+    from app.services.drill_load_generator import run_drill_load
+
+    init_db()
+
+    report = asyncio.run(run_drill_load(
+        app,
+        emergencies=args.emergencies,
+        clients_per_role=args.clients_per_role,
+        concurrency=args.concurrency,
+        send_delay=args.send_delay_ms / 1000,
+        timeout=args.timeout,
+        end_simulations=not args.keep_simulations,
+        encoding=args.encoding,
+        compression="deflate" if args.deflate else None,
+    ))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
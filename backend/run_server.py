@@ -2,9 +2,13 @@
 """
 Simple script to run the FastAPI server with proper environment setup.
 This ensures the .env file is loaded before importing any modules.
+
+    python run_server.py                 # development: one process with auto-reload
+    python run_server.py --production    # gunicorn, single worker by default, see SETUP.md
 """
 
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -19,5 +23,5 @@ if not os.environ.get("JWT_SECRET_KEY"):
     exit(1)
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
+    from app.server import serve, SERVER_MODE
+    serve("production" if "--production" in sys.argv[1:] else SERVER_MODE) 
\ No newline at end of file
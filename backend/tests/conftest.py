@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# Configure the app before any app module is imported
+_scratch = tempfile.mkdtemp(prefix="stomp-tests-")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'primary.db')}"
+os.environ["REPLICA_DATABASE_URLS"] = ""
+os.environ["EMERGENCY_EVENT_LOG"] = ""
+os.environ["VITALS_DATA_DIR"] = os.path.join(_scratch, "vitals")
+os.environ["PROFILE_DIR"] = os.path.join(_scratch, "profiles")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
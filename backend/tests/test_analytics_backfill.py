@@ -0,0 +1,68 @@
+import uuid
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal, init_db
+from app.models.emergency_simulation import EmergencySimulation
+from app.models.incident_report import IncidentReport
+from app.services.analytics_service import ResponseAnalytics
+
+
+def _report(team: str, incident_at: datetime, generated_at: datetime) -> IncidentReport:
+    report_id = str(uuid.uuid4())
+    return IncidentReport(
+        id=report_id, emergency_id=report_id, incident_at=incident_at, generated_at=generated_at,
+        report={
+            "athlete_data": {"team": team},
+            "incident_details": {"timestamp": incident_at.isoformat()},
+            "response_details": {"response_time_seconds": 30},
+        },
+    )
+
+
+def _drill(team: str, start_time: datetime) -> EmergencySimulation:
+    simulation_id = str(uuid.uuid4())
+    end_time = start_time + timedelta(minutes=5)
+    return EmergencySimulation(
+        id=simulation_id, initiated_by=1, team=team, start_time=start_time, end_time=end_time,
+        duration_seconds=300,
+        simulation={"id": simulation_id, "team": team, "start_time": start_time.isoformat(),
+                    "duration_seconds": 300, "response_times": {"5": 12.0}},
+    )
+
+
+def test_backfill_replays_only_the_recent_window_once():
+    init_db()
+    now = datetime.now()
+    team = f"backfill-{uuid.uuid4().hex[:8]}"
+    recovered = _drill(team, now - timedelta(days=1))
+    recovered_id = recovered.id
+    db = SessionLocal()
+    try:
+        db.add_all([
+            _report(team, now - timedelta(days=2), now - timedelta(days=2)),
+            # Outside the window
+            _report(team, now - timedelta(days=60), now - timedelta(days=60)),
+            # Generated after startup, so already recorded live
+            _report(team, now - timedelta(hours=1), now + timedelta(seconds=5)),
+            _drill(team, now - timedelta(days=3)),
+            _drill(team, now - timedelta(days=90)),
+            recovered,
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    analytics = ResponseAnalytics()
+    assert not analytics.backfilled
+    analytics.backfill_recent(now, {recovered_id}, days=30)
+    assert analytics.backfilled
+    stats = analytics.summary(team=team)["overall"]
+    assert stats["incidents"] == 1
+    assert stats["drills"] == 1
+    assert stats["drill_response_time_seconds"]["count"] == 1
+
+
+def test_backfill_can_be_disabled():
+    analytics = ResponseAnalytics()
+    assert analytics.backfill_recent(datetime.now(), days=0) == 0
+    assert analytics.backfilled
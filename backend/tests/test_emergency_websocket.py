@@ -0,0 +1,36 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import emergency_alerts
+from app.services.emergency_alert_service import manager
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(emergency_alerts.router)
+    return TestClient(app)
+
+
+def test_non_object_messages_get_an_error_frame(client):
+    with client.websocket_connect("/ws/7/coach") as websocket:
+        websocket.send_text(json.dumps([1, 2]))
+        assert websocket.receive_json() == {"type": "error", "message": "Messages must be objects"}
+        websocket.send_text(json.dumps({"type": "ping", "timestamp": 1}))
+        assert websocket.receive_json() == {"type": "pong", "timestamp": 1}
+    assert "7:coach" not in manager.active_connections
+
+
+def test_connection_is_unregistered_when_the_handler_fails(client, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("tracker unavailable")
+
+    monkeypatch.setattr(emergency_alerts.responder_tracker, "record", fail)
+    with pytest.raises(RuntimeError):
+        with client.websocket_connect("/ws/8/referee") as websocket:
+            websocket.send_text(json.dumps({"type": "emergency_response", "emergency_id": "e1"}))
+            websocket.receive_json()
+    assert "8:referee" not in manager.active_connections
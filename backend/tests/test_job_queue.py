@@ -0,0 +1,66 @@
+import asyncio
+
+from app.services.job_queue import JobQueue, JobStatus
+
+
+def test_same_key_shares_a_pending_job_and_requeues_after_it_finishes():
+    async def scenario():
+        queue = JobQueue(workers=1, retry_delay=0)
+        release = asyncio.Event()
+        runs = []
+
+        async def work(value):
+            await release.wait()
+            runs.append(value)
+            return value
+
+        first = queue.submit(work, 1, key="emergency-1")
+        assert queue.submit(work, 2, key="emergency-1") is first
+        release.set()
+        while first.pending:
+            await asyncio.sleep(0)
+        assert first.status == JobStatus.DONE
+
+        second = queue.submit(work, 3, key="emergency-1")
+        assert second is not first
+        while second.pending:
+            await asyncio.sleep(0)
+        assert runs == [1, 3]
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_finished_jobs_expire_from_the_registry():
+    async def scenario():
+        queue = JobQueue(workers=1, result_ttl=0)
+
+        async def work():
+            return "ok"
+
+        job = queue.submit(work, key="k")
+        while job.pending:
+            await asyncio.sleep(0)
+        assert queue.get(job.id) is None
+        assert "k" not in queue._job_by_key
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stop_fails_jobs_that_never_ran():
+    async def scenario():
+        queue = JobQueue(workers=1)
+
+        async def hang():
+            await asyncio.sleep(60)
+
+        running = queue.submit(hang, key="a")
+        queued = queue.submit(hang, key="b")
+        await asyncio.sleep(0)
+        await queue.stop()
+        assert running.status == queued.status == JobStatus.FAILED
+        assert queue.submit(hang, key="b") is not queued
+        await queue.stop()
+
+    asyncio.run(scenario())
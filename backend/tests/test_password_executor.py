@@ -0,0 +1,26 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.rate_limiter import PasswordHashExecutor
+
+
+def test_run_refuses_work_past_max_pending():
+    async def scenario():
+        executor = PasswordHashExecutor(workers=1, max_pending=1)
+        release = threading.Event()
+        first = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0)
+        assert executor.pending == 1
+
+        with pytest.raises(asyncio.QueueFull):
+            await executor.run(lambda: True)
+        assert executor.pending == 1
+
+        release.set()
+        assert await first is True
+        assert executor.pending == 0
+        assert await executor.run(lambda: "ok") == "ok"
+
+    asyncio.run(scenario())
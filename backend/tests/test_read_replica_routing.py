@@ -0,0 +1,131 @@
+import os
+
+import pytest
+from sqlalchemy import func, select
+
+from app import database
+from app.database import Base, Replica, SessionLocal, init_db
+from app.models.emergency_contact import EmergencyContactCreate
+from app.models.incident_report import IncidentReport
+from app.models.notification import NotificationPreference, NotificationRead, NotificationReadState
+from app.services import emergency_contact_service, incident_report_service, notification_service
+
+
+@pytest.fixture
+def lagging_replica(tmp_path, monkeypatch):
+    """A second SQLite file with the schema but none of the primary's rows, routed to for reads"""
+    init_db()
+    replica = Replica(f"sqlite:///{os.path.join(tmp_path, 'replica.db')}")
+    Base.metadata.create_all(bind=replica.engine)
+    replica.healthy = True
+    monkeypatch.setattr(database, "replicas", [replica])
+    yield replica
+    replica.engine.dispose()
+
+
+def test_plain_reads_go_to_the_replica(lagging_replica):
+    db = SessionLocal()
+    try:
+        notification_service.create_notification(db, "t", "m", "update", None)
+        db.commit()
+    finally:
+        db.close()
+    db = SessionLocal()
+    try:
+        # The replica has not caught up, which is what the write paths below must not trip over
+        assert db.get_bind(clause=select(IncidentReport)) is lagging_replica.engine
+    finally:
+        db.close()
+
+
+def test_mark_read_sees_new_notification_and_existing_read(lagging_replica):
+    db = SessionLocal()
+    try:
+        notification = notification_service.create_notification(db, "t", "m", "update", None)
+        db.commit()
+        notification_id, seq = notification.id, notification.seq
+    finally:
+        db.close()
+    for _ in range(2):
+        db = SessionLocal()
+        try:
+            assert notification_service.mark_read(db, notification_id, 7, "coach")
+        finally:
+            db.close()
+    db = SessionLocal()
+    db.use_primary()
+    try:
+        reads = db.scalar(select(func.count()).select_from(NotificationRead).where(
+            NotificationRead.user_id == 7, NotificationRead.notification_seq == seq,
+        ))
+        assert reads == 1
+    finally:
+        db.close()
+
+
+def test_mark_all_read_never_moves_the_watermark_back(lagging_replica):
+    db = SessionLocal()
+    try:
+        notification = notification_service.create_notification(db, "t", "m", "update", None)
+        db.commit()
+        seq = notification.seq
+    finally:
+        db.close()
+    db = SessionLocal()
+    try:
+        notification_service.mark_all_read(db, 8, "coach")
+    finally:
+        db.close()
+    db = SessionLocal()
+    db.use_primary()
+    try:
+        assert db.get(NotificationReadState, 8).read_upto_seq >= seq
+    finally:
+        db.close()
+
+
+def test_update_preferences_updates_the_existing_row(lagging_replica):
+    for value in (False, True):
+        db = SessionLocal()
+        try:
+            notification_service.update_preferences(db, 9, {"monthly_reminders": value})
+        finally:
+            db.close()
+    db = SessionLocal()
+    db.use_primary()
+    try:
+        assert db.get(NotificationPreference, 9).monthly_reminders is True
+    finally:
+        db.close()
+
+
+def test_report_retry_does_not_insert_a_duplicate(lagging_replica):
+    report_id = "replica-lag-report"
+    for _ in range(2):
+        assert incident_report_service.generate_incident_report("e1", 1, report_id) == report_id
+    db = SessionLocal()
+    db.use_primary()
+    try:
+        assert db.scalar(select(func.count()).select_from(IncidentReport).where(IncidentReport.id == report_id)) == 1
+    finally:
+        db.close()
+
+
+def test_contact_just_created_can_be_updated_and_deleted(lagging_replica):
+    contact = EmergencyContactCreate(name="A", phone_number="555", relationship="parent")
+    db = SessionLocal()
+    try:
+        contact_id = emergency_contact_service.create_emergency_contact(db, contact, 10).id
+    finally:
+        db.close()
+    renamed = EmergencyContactCreate(name="B", phone_number="555", relationship="parent")
+    db = SessionLocal()
+    try:
+        assert emergency_contact_service.update_emergency_contact(db, contact_id, renamed, 10).name == "B"
+    finally:
+        db.close()
+    db = SessionLocal()
+    try:
+        assert emergency_contact_service.delete_emergency_contact(db, contact_id, 10) is not None
+    finally:
+        db.close()
@@ -0,0 +1,60 @@
+import asyncio
+import os
+import time
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.services.request_profiler import ProfilerMiddleware, _sampler_by_thread
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def slow_dependency():
+    _busy(0.05)
+
+
+def _profiled_app(directory):
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_route(_=Depends(slow_dependency)):
+        _busy(0.05)
+        return {"ok": True}
+
+    @app.get("/to-thread")
+    async def to_thread_route():
+        await asyncio.to_thread(_busy, 0.05)
+        return {"ok": True}
+
+    app.add_middleware(ProfilerMiddleware, token="secret", directory=str(directory))
+    return app
+
+
+def _profile(directory):
+    [name] = [name for name in os.listdir(directory) if name.endswith(".collapsed")]
+    with open(os.path.join(directory, name)) as f:
+        return f.read()
+
+
+def test_threadpool_calls_are_attributed_to_the_profiled_request(tmp_path):
+    with TestClient(_profiled_app(tmp_path)) as client:
+        assert client.get("/sync", headers={"X-Debug-Profile": "secret"}).status_code == 200
+    stacks = _profile(tmp_path)
+    assert "sync_route (" in stacks
+    assert "slow_dependency (" in stacks
+    assert not _sampler_by_thread
+
+
+def test_asyncio_to_thread_calls_are_attributed_to_the_profiled_request(tmp_path):
+    with TestClient(_profiled_app(tmp_path)) as client:
+        assert client.get("/to-thread", headers={"X-Debug-Profile": "secret"}).status_code == 200
+        # Unprofiled requests leave no trace
+        assert client.get("/sync").status_code == 200
+    stacks = _profile(tmp_path)
+    assert "_busy (" in stacks
+    assert not _sampler_by_thread
@@ -0,0 +1,28 @@
+from starlette.requests import Request
+
+from app.services.response_cache import ResponseCache
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+
+def test_least_recently_served_entries_are_evicted_past_the_cap():
+    cache = ResponseCache(max_entries=2)
+    builds = []
+
+    def build(user_id):
+        def payload():
+            builds.append(user_id)
+            return {"user": user_id}
+        return payload
+
+    for user_id in (1, 2):
+        cache.respond(_request(), "dashboard", build(user_id), ttl=60, user_id=user_id)
+    cache.respond(_request(), "dashboard", build(1), ttl=60, user_id=1)
+    cache.respond(_request(), "dashboard", build(3), ttl=60, user_id=3)
+
+    assert len(cache._entries) == 2
+    cache.respond(_request(), "dashboard", build(1), ttl=60, user_id=1)
+    cache.respond(_request(), "dashboard", build(2), ttl=60, user_id=2)
+    assert builds == [1, 2, 3, 2]
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.services.task_supervisor import TaskSupervisor
+
+
+async def _hold(event: asyncio.Event) -> None:
+    await event.wait()
+
+
+def test_spawn_never_waits_and_caps_running_tasks():
+    async def scenario():
+        supervisor = TaskSupervisor(max_concurrency=2, max_pending=10)
+        running = peak = 0
+
+        async def work():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        tasks = [supervisor.spawn(work(), name="work") for _ in range(6)]
+        assert all(task is not None for task in tasks)
+        await asyncio.gather(*tasks)
+        assert peak == 2
+        assert supervisor.stats()["tasks"]["work"]["completed"] == 6
+
+    asyncio.run(scenario())
+
+
+def test_spawns_past_max_pending_are_dropped_and_counted():
+    async def scenario():
+        supervisor = TaskSupervisor(max_concurrency=2, max_pending=4)
+        release = asyncio.Event()
+        held = [supervisor.spawn(_hold(release), name="burst") for _ in range(4)]
+        dropped = [_hold(release) for _ in range(3)]
+        assert all(supervisor.spawn(coro, name="burst") is None for coro in dropped)
+        # Dropped coroutines are closed, not left un-awaited
+        assert all(coro.cr_frame is None for coro in dropped)
+        assert supervisor.in_flight == 4
+        stats = supervisor.stats()["tasks"]["burst"]
+        assert stats["started"] == 4
+        assert stats["dropped"] == 3
+
+        release.set()
+        await asyncio.gather(*held)
+        assert supervisor.in_flight == 0
+        assert supervisor.spawn(_hold(release), name="burst") is not None
+        await supervisor.drain()
+
+    asyncio.run(scenario())
+
+
+def test_start_accepts_tasks_after_a_drain():
+    async def scenario():
+        supervisor = TaskSupervisor(max_concurrency=2)
+        await supervisor.drain()
+        closed = asyncio.sleep(0)
+        assert supervisor.spawn(closed) is None
+        supervisor.start()
+        task = supervisor.spawn(asyncio.sleep(0), name="after")
+        await task
+        assert supervisor.stats()["tasks"]["after"]["completed"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,73 @@
+import threading
+
+from app.services import vitals_store as vitals_module
+from app.services.vitals_store import VitalsStore
+
+
+def _fill(store: VitalsStore, athlete_id: str, samples: int, start_ms: int = 1_000_000) -> None:
+    for i in range(samples):
+        store.append(athlete_id, {"timestamp": start_ms + i, "heart_rate": 60 + i % 40})
+    store.flush()
+
+
+def _rows(store: VitalsStore, athlete_id: str):
+    timestamps, heart_rates = [], []
+    for part in store.query(athlete_id):
+        timestamps.extend(part.timestamps.tolist())
+        heart_rates.extend(part.columns["heart_rate"].tolist())
+    return timestamps, heart_rates
+
+
+def test_compaction_caps_segment_size_and_keeps_samples(tmp_path):
+    store = VitalsStore(data_dir=str(tmp_path), batch_size=10, max_segment_rows=40)
+    _fill(store, "7", 200)
+    before = _rows(store, "7")
+    assert len(store._load_segments("7")) == 20
+
+    assert store.compact("7") == 20
+    segments = store._load_segments("7")
+    assert [segment.rows for segment in segments] == [40] * 5
+    assert _rows(store, "7") == before
+
+    # Full segments are left alone on later passes
+    _fill(store, "7", 20, start_ms=2_000_000)
+    assert store.compact("7") == 2
+    assert [segment.rows for segment in store._load_segments("7")] == [40] * 5 + [20]
+    assert store.compact("7") == 0
+
+
+def test_appends_and_queries_proceed_while_a_compaction_writes(tmp_path, monkeypatch):
+    store = VitalsStore(data_dir=str(tmp_path), batch_size=10)
+    _fill(store, "8", 50)
+    writing = threading.Event()
+    release = threading.Event()
+    write_segment = vitals_module.write_segment
+
+    def slow_write(path, timestamps, columns):
+        writing.set()
+        assert release.wait(5)
+        write_segment(path, timestamps, columns)
+
+    monkeypatch.setattr(vitals_module, "write_segment", slow_write)
+    compaction = threading.Thread(target=store.compact, args=("8",))
+    compaction.start()
+    try:
+        assert writing.wait(5)
+        done = threading.Event()
+
+        def use_store():
+            store.append("8", {"timestamp": 5_000_000, "heart_rate": 99})
+            store.query("8")
+            done.set()
+
+        threading.Thread(target=use_store).start()
+        # The store lock is free while the merged segment is written
+        assert done.wait(2)
+    finally:
+        release.set()
+        compaction.join()
+    monkeypatch.setattr(vitals_module, "write_segment", write_segment)
+    timestamps, heart_rates = _rows(store, "8")
+    assert len(timestamps) == 51
+    assert timestamps == sorted(timestamps)
+    assert heart_rates[-1] == 99
@@ -10,15 +10,18 @@ sys.path.insert(0, backend_path)
 original_cwd = os.getcwd()
 os.chdir(backend_path)
 
+# Tables are created by `python backend/init_db.py` at deploy time, not on every cold start
+os.environ.setdefault("DB_AUTO_CREATE", "false")
+
 try:
-    # Import the FastAPI app from backend/main.py
-    from main import app
+    # Import the FastAPI app from backend/app/main.py
+    from app.main import app
 
     # Restore original working directory if needed
     os.chdir(original_cwd)
 
 except ImportError as e:
-    print(f"❌ Import error from backend/main.py: {e}")
+    print(f"❌ Import error from backend/app/main.py: {e}")
     print(f"📁 Current directory: {os.getcwd()}")
     print(f"📁 Contents of backend folder: {os.listdir(backend_path) if os.path.exists(backend_path) else 'Folder not found'}")
     raise